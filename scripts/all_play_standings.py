@@ -1,129 +1,24 @@
-import sqlite3
-from collections import defaultdict
-from rich.console import Console
-from rich.table import Table
+import db
+import output
+import standings
 
 # Configuration
 DB_FILE = "sleeper_league_25.db"
+LEAGUE_ID = standings.LEAGUE_ID
 
-def get_all_weekly_scores(db_file):
-    """Get all scores for all teams for each week"""
-    conn = sqlite3.connect(db_file)
-    c = conn.cursor()
-    
-    c.execute("""
-        SELECT r.owner_id, u.display_name, m.week, m.points
-        FROM matchups m
-        JOIN rosters r ON m.roster_id = r.roster_id
-        JOIN users u ON r.owner_id = u.user_id
-        WHERE m.points > 0
-        ORDER BY m.week, m.points DESC
-    """)
-    
-    weekly_scores = defaultdict(list)  # {week: [(owner_id, name, points), ...]}
-    team_names = {}
-    
-    for owner_id, name, week, points in c.fetchall():
-        weekly_scores[week].append({
-            'owner_id': owner_id,
-            'name': name,
-            'points': points
-        })
-        team_names[owner_id] = name
-    
-    conn.close()
-    return weekly_scores, team_names
-
-def get_actual_records(db_file):
-    """Get actual head-to-head win-loss records"""
-    conn = sqlite3.connect(db_file)
-    c = conn.cursor()
-    
-    c.execute("""
-        SELECT m1.week, 
-               r1.owner_id, m1.points,
-               r2.owner_id, m2.points
-        FROM matchups m1
-        JOIN matchups m2 ON m1.matchup_id_group = m2.matchup_id_group 
-            AND m1.week = m2.week 
-            AND m1.roster_id < m2.roster_id
-        JOIN rosters r1 ON m1.roster_id = r1.roster_id
-        JOIN rosters r2 ON m2.roster_id = r2.roster_id
-        WHERE m1.points > 0
-    """)
-    
-    actual_records = defaultdict(lambda: {'wins': 0, 'losses': 0, 'ties': 0})
-    
-    for week, owner1, points1, owner2, points2 in c.fetchall():
-        if points1 > points2:
-            actual_records[owner1]['wins'] += 1
-            actual_records[owner2]['losses'] += 1
-        elif points2 > points1:
-            actual_records[owner2]['wins'] += 1
-            actual_records[owner1]['losses'] += 1
-        else:
-            actual_records[owner1]['ties'] += 1
-            actual_records[owner2]['ties'] += 1
-    
-    conn.close()
-    return actual_records
-
-def calculate_all_play_records(weekly_scores):
-    """Calculate what record would be if every team played every other team each week"""
-    all_play_records = defaultdict(lambda: {
-        'wins': 0, 
-        'losses': 0, 
-        'ties': 0,
-        'weekly_ranks': [],
-        'total_points': 0
-    })
-    
-    # For each week, compare every team against every other team
-    for week, scores in weekly_scores.items():
-        # Sort by points for this week
-        scores_sorted = sorted(scores, key=lambda x: x['points'], reverse=True)
-        
-        # Calculate rank for each team this week
-        for rank, team in enumerate(scores_sorted, 1):
-            all_play_records[team['owner_id']]['weekly_ranks'].append(rank)
-            all_play_records[team['owner_id']]['total_points'] += team['points']
-        
-        # Compare each team against all others
-        num_teams = len(scores)
-        for i, team1 in enumerate(scores):
-            wins_this_week = 0
-            losses_this_week = 0
-            ties_this_week = 0
-            
-            for j, team2 in enumerate(scores):
-                if i == j:
-                    continue  # Don't compare team to itself
-                
-                if team1['points'] > team2['points']:
-                    wins_this_week += 1
-                elif team1['points'] < team2['points']:
-                    losses_this_week += 1
-                else:
-                    ties_this_week += 1
-            
-            all_play_records[team1['owner_id']]['wins'] += wins_this_week
-            all_play_records[team1['owner_id']]['losses'] += losses_this_week
-            all_play_records[team1['owner_id']]['ties'] += ties_this_week
-    
-    return all_play_records
-
-def calculate_luck_index(actual_records, all_play_records, team_names):
+def calculate_luck_index(records):
     """Calculate how lucky/unlucky each team has been"""
     luck_data = []
     
-    for owner_id in actual_records.keys():
-        actual_wins = actual_records[owner_id]['wins']
-        actual_losses = actual_records[owner_id]['losses']
+    for owner_id, record in records.items():
+        # Actual record includes the median game in leagues that play one
+        actual_wins = record['wins']
+        actual_losses = record['losses']
         actual_pct = actual_wins / (actual_wins + actual_losses) if (actual_wins + actual_losses) > 0 else 0
         
         # All-play winning percentage
-        all_play_wins = all_play_records[owner_id]['wins']
-        all_play_losses = all_play_records[owner_id]['losses']
+        all_play_wins = record['all_play_wins']
+        all_play_losses = record['all_play_losses']
         all_play_pct = all_play_wins / (all_play_wins + all_play_losses) if (all_play_wins + all_play_losses) > 0 else 0
         
         # Luck index: positive = lucky (actual better than all-play), negative = unlucky
@@ -131,9 +26,11 @@ def calculate_luck_index(actual_records, all_play_records, team_names):
         
         luck_data.append({
             'owner_id': owner_id,
-            'name': team_names[owner_id],
+            'name': record['name'],
             'actual_wins': actual_wins,
             'actual_losses': actual_losses,
+            'median_wins': record['median_wins'],
+            'median_losses': record['median_losses'],
             'actual_pct': actual_pct,
             'all_play_pct': all_play_pct,
             'luck_index': luck_index
@@ -141,8 +38,74 @@ def calculate_luck_index(actual_records, all_play_records, team_names):
     
     return luck_data
 
-def print_true_standings(all_play_records, team_names, actual_records):
+def true_standings_records(records):
+    """Build all-play standings records, sorted by win % then total points"""
+    rows = []
+    for owner_id, record in records.items():
+        wins = record['all_play_wins']
+        losses = record['all_play_losses']
+        ties = record['all_play_ties']
+        win_pct = wins / (wins + losses) if (wins + losses) > 0 else 0
+        
+        rows.append({
+            'owner_id': owner_id,
+            'name': record['name'],
+            'wins': wins,
+            'losses': losses,
+            'ties': ties,
+            'win_pct': win_pct,
+            'avg_rank': record['avg_rank'],
+            'total_points': record['total_points'],
+            'actual_wins': record['wins'],
+            'actual_losses': record['losses']
+        })
+    
+    # Sort by win percentage, then by total points
+    rows.sort(key=lambda x: (x['win_pct'], x['total_points']), reverse=True)
+    
+    for rank, team in enumerate(rows, 1):
+        yield {'rank': rank, **team}
+
+def luck_records(luck_data):
+    """Build luck index records, luckiest first"""
+    for team in sorted(luck_data, key=lambda x: x['luck_index'], reverse=True):
+        luck_index = team['luck_index']
+        
+        # Determine luck assessment
+        if luck_index > 0.100:
+            assessment = "Very Lucky"
+        elif luck_index > 0.050:
+            assessment = "Lucky"
+        elif luck_index > -0.050:
+            assessment = "Neutral"
+        elif luck_index > -0.100:
+            assessment = "Unlucky"
+        elif luck_index > -0.200:
+            assessment = "Very Unlucky"
+        else:
+            assessment = "Gawet Mode"
+        
+        yield {**team, 'assessment': assessment}
+
+def summary_records(records, rules):
+    """Build the single summary statistics record"""
+    total_weeks = max((record['weeks_played'] for record in records.values()), default=0)
+    total_teams = len(records)
+    
+    yield {
+        'weeks_played': total_weeks,
+        'teams': total_teams,
+        'median_game': rules['median_game'],
+        'all_play_matchups_per_week': total_teams * (total_teams - 1),
+        'all_play_games': total_weeks * total_teams * (total_teams - 1)
+    }
+
+@output.rich_renderer("true_standings")
+def print_true_standings(rows):
     """Print all-play standings table"""
+    from rich.console import Console
+    from rich.table import Table
+    
     console = Console()
     
     table = Table(
@@ -158,57 +121,41 @@ def print_true_standings(all_play_records, team_names, actual_records):
     table.add_column("Avg Rank", justify="center")
     table.add_column("Total PF", justify="center")
     
-    # Prepare data and sort by all-play wins
-    standings = []
-    for owner_id, record in all_play_records.items():
-        wins = record['wins']
-        losses = record['losses']
-        ties = record['ties']
-        win_pct = wins / (wins + losses) if (wins + losses) > 0 else 0
-        avg_rank = sum(record['weekly_ranks']) / len(record['weekly_ranks']) if record['weekly_ranks'] else 0
-        
-        actual = actual_records[owner_id]
-        actual_record = f"{actual['wins']}-{actual['losses']}"
-        
-        standings.append({
-            'owner_id': owner_id,
-            'name': team_names[owner_id],
-            'wins': wins,
-            'losses': losses,
-            'ties': ties,
-            'win_pct': win_pct,
-            'avg_rank': avg_rank,
-            'total_points': record['total_points'],
-            'actual_record': actual_record
-        })
-    
-    # Sort by win percentage, then by total points
-    standings.sort(key=lambda x: (x['win_pct'], x['total_points']), reverse=True)
-    
     # Add rows
-    for rank, team in enumerate(standings, 1):
+    for team in rows:
         all_play_record = f"{team['wins']}-{team['losses']}"
         if team['ties'] > 0:
             all_play_record += f"-{team['ties']}"
         
         table.add_row(
-            str(rank),
+            str(team['rank']),
             team['name'],
             all_play_record,
             f"{team['win_pct']:.3f}",
-            team['actual_record'],
+            f"{team['actual_wins']}-{team['actual_losses']}",
             f"{team['avg_rank']:.1f}",
             f"{team['total_points']:.1f}"
         )
     
     console.print(table)
 
-def print_luck_rankings(luck_data):
+# Emoji and row style for each luck assessment
+LUCK_STYLES = {
+    "Very Lucky": ("🍀", "bold green"),
+    "Lucky": ("🙂", "green"),
+    "Neutral": ("😐", "white"),
+    "Unlucky": ("😞", "yellow"),
+    "Very Unlucky": ("💀", "orange1"),
+    "Gawet Mode": ("💩", "bold red"),
+}
+
+@output.rich_renderer("luck_index")
+def print_luck_rankings(luck_rows):
     """Print luck index rankings"""
-    console = Console()
+    from rich.console import Console
+    from rich.table import Table
     
-    # Sort by luck index
-    luck_data_sorted = sorted(luck_data, key=lambda x: x['luck_index'], reverse=True)
+    console = Console()
     
     table = Table(
         title="Luck Index (Actual vs All-Play Performance)", 
@@ -222,29 +169,8 @@ def print_luck_rankings(luck_data):
     table.add_column("Luck Index", justify="center", style="bold")
     table.add_column("Assessment", justify="center")
     
-    for team in luck_data_sorted:
-        luck_index = team['luck_index']
-        
-        # Determine luck assessment
-        if luck_index > 0.100:
-            assessment = "🍀 Very Lucky"
-            style = "bold green"
-        elif luck_index > 0.050:
-            assessment = "🙂 Lucky"
-            style = "green"
-        elif luck_index > -0.050:
-            assessment = "😐 Neutral"
-            style = "white"
-        elif luck_index > -0.100:
-            assessment = "😞 Unlucky"
-            style = "yellow"
-        elif luck_index > -0.200:
-            assessment = "💀 Very Unlucky"
-            style = "orange1"
-        else:
-            assessment = "💩 Gawet Mode"
-            style = "bold red"
-        
+    for team in luck_rows:
+        emoji, style = LUCK_STYLES[team['assessment']]
         actual_record = f"{team['actual_wins']}-{team['actual_losses']}"
         
         table.add_row(
@@ -252,56 +178,54 @@ def print_luck_rankings(luck_data):
             actual_record,
             f"{team['actual_pct']:.3f}",
             f"{team['all_play_pct']:.3f}",
-            f"{luck_index:+.3f}",
-            assessment,
+            f"{team['luck_index']:+.3f}",
+            f"{emoji} {team['assessment']}",
             style=style
         )
     
     console.print(table)
 
-def print_summary_stats(weekly_scores, all_play_records):
+@output.rich_renderer("summary_stats")
+def print_summary_stats(summary):
     """Print summary statistics"""
-    console = Console()
+    from rich.console import Console
     
-    total_weeks = len(weekly_scores)
-    total_teams = len(all_play_records)
-    
-    console.print("\n[bold cyan]Summary Statistics[/bold cyan]")
-    console.print(f"Weeks Played: {total_weeks}")
-    console.print(f"Teams: {total_teams}")
-    console.print(f"Total Matchups Per Week (All-Play): {total_teams * (total_teams - 1)}")
-    console.print(f"Total All-Play Games: {total_weeks * total_teams * (total_teams - 1)}")
-
-def main():
     console = Console()
     
-    console.print("[bold magenta]All-Play Record & True Standings Calculator")
-    console.print("[bold magenta]═" * 30 + "\n")
-    
-    console.print("[yellow]Loading data...[/yellow]")
+    for stats in summary:
+        console.print("\n[bold cyan]Summary Statistics[/bold cyan]")
+        console.print(f"Weeks Played: {stats['weeks_played']}")
+        console.print(f"Teams: {stats['teams']}")
+        console.print(f"League Median Game: {'Yes' if stats['median_game'] else 'No'}")
+        console.print(f"Total Matchups Per Week (All-Play): {stats['all_play_matchups_per_week']}")
+        console.print(f"Total All-Play Games: {stats['all_play_games']}")
+
+@db.with_snapshot
+def main(db_file=DB_FILE, league_id=LEAGUE_ID, out=None):
+    out = out or output.RichOutput()
     
-    # Get all weekly scores
-    weekly_scores, team_names = get_all_weekly_scores(DB_FILE)
+    out.log("[bold magenta]All-Play Record & True Standings Calculator")
+    out.log("[bold magenta]═" * 30 + "\n")
     
-    # Get actual head-to-head records
-    actual_records = get_actual_records(DB_FILE)
+    out.log("[yellow]Loading data...[/yellow]")
     
-    # Calculate all-play records
-    console.print("[yellow]Calculating all-play records...[/yellow]")
-    all_play_records = calculate_all_play_records(weekly_scores)
+    # Actual (head-to-head plus median) and all-play records under the league's rules
+    rules = standings.get_league_rules(db_file, league_id)
+    out.log("[yellow]Calculating all-play records...[/yellow]")
+    records = standings.get_records(db_file, league_id)
     
     # Calculate luck index
-    console.print("[yellow]Analyzing luck index...[/yellow]\n")
-    luck_data = calculate_luck_index(actual_records, all_play_records, team_names)
+    out.log("[yellow]Analyzing luck index...[/yellow]\n")
+    luck_data = calculate_luck_index(records)
     
-    # Print results
-    print_true_standings(all_play_records, team_names, actual_records)
-    console.print()
-    print_luck_rankings(luck_data)
-    console.print()
-    print_summary_stats(weekly_scores, all_play_records)
+    # Write results
+    out.write("true_standings", true_standings_records(records))
+    out.log()
+    out.write("luck_index", luck_records(luck_data))
+    out.log()
+    out.write("summary_stats", summary_records(records, rules))
     
-    console.print("\n[bold green]Analysis complete![/bold green]\n")
+    out.log("\n[bold green]Analysis complete![/bold green]\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import sys
+import time
+import numpy as np
+import schedule_luck
+import score_models
+import utl
+
+# ======================================================================== #
+#                                                                          #
+#   Measures what each score model costs and how well it predicts. Fit     #
+#   and sample throughput are timed on the league's score histories;       #
+#   accuracy is the Brier score of predicting every played game from       #
+#   the weeks before it (lower is better, 0.25 is a coin flip).            #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+DB_FILE = utl.DB_FILE_25
+NUM_RUNS = 20
+NUM_SIMULATIONS = utl.NUM_SIMULATIONS
+MIN_WEEKS = 3  # Weeks of history before a game is predicted
+
+def time_fit(model, team_scores, n_runs=NUM_RUNS):
+    """Median seconds to fit every team once"""
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        model.fit(team_scores)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+def time_sample(model, n_sims, rng, n_runs=NUM_RUNS):
+    """Median seconds to draw n_sims scores for every team"""
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        model.sample(n_sims, rng)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+def brier_score(name, scores, template, n_sims, rng):
+    """Mean squared error of each week's predicted win probabilities, fitted on earlier weeks"""
+    errors = []
+    for week in range(MIN_WEEKS, scores.shape[0]):
+        history = {team: scores[:week, team] for team in range(scores.shape[1])}
+        model = score_models.get_score_model(name).fit(history)
+        samples = model.sample(n_sims, rng)
+
+        pairs = [(team, opponent) for team, opponent in enumerate(template[week]) if team < opponent]
+        probs = score_models.win_probabilities(samples, pairs)
+        for (team, opponent), prob in zip(pairs, probs):
+            a, b = scores[week, team], scores[week, opponent]
+            outcome = 1.0 if a > b else 0.5 if a == b else 0.0
+            errors.append((prob - outcome) ** 2)
+    return float(np.mean(errors)) if errors else float("nan")
+
+def main(db_file=DB_FILE, n_sims=NUM_SIMULATIONS):
+    scores, template, teams, _ = schedule_luck.get_score_matrix(db_file)
+    if len(scores) == 0:
+        print("No completed weeks found. Run sync first.")
+        return 1
+
+    team_scores = {team: scores[:, t] for t, team in enumerate(teams)}
+    rng = np.random.default_rng(0)
+    n_teams = len(teams)
+
+    print("=" * 78)
+    print(f"Score Model Benchmark ({n_teams} teams, {scores.shape[0]} weeks, {n_sims:,} draws per team)")
+    print("=" * 78)
+    print(f"{'model':12} {'fit':>10} {'teams/s':>12} {'sample':>10} {'Mdraws/s':>10} {'brier':>8}")
+
+    for name in score_models.SCORE_MODELS:
+        model = score_models.get_score_model(name)
+        fit_seconds = time_fit(model, team_scores)
+        sample_seconds = time_sample(model, n_sims, rng)
+        brier = brier_score(name, scores, template, n_sims, rng)
+        print(
+            f"{name:12} {fit_seconds*1000:8.2f}ms {n_teams/fit_seconds:12,.0f} "
+            f"{sample_seconds*1000:8.2f}ms {n_teams*n_sims/sample_seconds/1e6:10.1f} {brier:8.4f}"
+        )
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:2]))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# ======================================================================== #
+#                                                                          #
+#   Measures CLI startup time by running main.py in fresh interpreters.    #
+#   The budget applies on top of bare interpreter startup: --help and      #
+#   cheap subcommands must stay under it and must not pull in numpy /      #
+#   rich / requests.                                                       #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+BUDGET_MS = 100
+NUM_RUNS = 15
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(SCRIPTS_DIR, "main.py")
+HEAVY_MODULES = ("numpy", "rich", "requests")
+
+CASES = [
+    ("python (baseline)", [sys.executable, "-c", "pass"]),
+    ("main.py --help", [sys.executable, MAIN, "--help"]),
+    ("main.py sync --help", [sys.executable, MAIN, "sync", "--help"]),
+    ("main.py simulate --help", [sys.executable, MAIN, "simulate", "--help"]),
+    ("main.py report --help", [sys.executable, MAIN, "report", "--help"]),
+]
+
+def time_command(cmd, n_runs=NUM_RUNS):
+    """Run a command n_runs times and return the wall-clock times in ms"""
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=SCRIPTS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def heavy_modules_loaded(argv):
+    """Return which heavy modules get imported when main.py runs with argv"""
+    probe = (
+        "import sys; sys.argv = ['main.py'] + sys.argv[1:]\n"
+        "import main\n"
+        "try:\n"
+        "    main.main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe] + argv,
+        cwd=SCRIPTS_DIR, capture_output=True, text=True
+    )
+    last_line = result.stderr.strip().splitlines()[-1:] or [""]
+    return [m for m in last_line[0].split(",") if m]
+
+def main():
+    print("=" * 60)
+    print(f"CLI Startup Benchmark ({NUM_RUNS} runs each, budget {BUDGET_MS} ms)")
+    print("=" * 60)
+
+    over_budget = False
+    baseline = None
+    for label, cmd in CASES:
+        times = time_command(cmd)
+        median = statistics.median(times)
+        if baseline is None:
+            baseline = median
+            print(f"{label:28} min {min(times):6.1f} ms   median {median:6.1f} ms")
+            continue
+
+        overhead = median - baseline
+        status = "ok" if overhead < BUDGET_MS else "OVER BUDGET"
+        over_budget |= overhead >= BUDGET_MS
+        heavy = heavy_modules_loaded(cmd[2:])
+        if heavy:
+            status += f" (imports {', '.join(heavy)})"
+            over_budget = True
+        print(f"{label:28} min {min(times):6.1f} ms   median {median:6.1f} ms   +{overhead:5.1f} ms   {status}")
+
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import functools
+import inspect
+import os
+import sqlite3
+
+# ======================================================================== #
+#                                                                          #
+#   SQLite access shared by ingest and the analyses. The DB runs in WAL    #
+#   mode: setup_db stages a whole refresh in one write transaction and     #
+#   publishes it atomically with a data_version bump, while readers pin    #
+#   a snapshot for the length of an analysis. Readers never block the      #
+#   ingest and never see a half-written refresh.                           #
+#                                                                          #
+# ======================================================================== #
+
+
+BUSY_TIMEOUT_SECONDS = 30
+
+class Snapshot(sqlite3.Connection):
+    """
+    Read connection pinned to one version of the data. Analysis functions
+    can be handed a Snapshot wherever they take a db_file; their close()
+    is ignored so every query sees the same snapshot until release().
+    """
+
+    def close(self):
+        pass
+
+    def release(self):
+        if self.in_transaction:
+            self.rollback()
+        super().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+def connect(db_file):
+    """Open a connection, or reuse the connection of an open Snapshot"""
+    if isinstance(db_file, Snapshot):
+        return db_file
+    return sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_SECONDS)
+
+def db_path(db_file):
+    """Absolute path of the DB file behind a path or Snapshot"""
+    if isinstance(db_file, Snapshot):
+        return db_file.execute("PRAGMA database_list").fetchone()[2]
+    return os.path.abspath(db_file)
+
+def connect_writer(db_file):
+    """Open the ingest connection and make sure the DB is in WAL mode"""
+    conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def open_snapshot(db_file):
+    """Start a read transaction; all reads through it see one consistent version"""
+    if isinstance(db_file, Snapshot):
+        return db_file
+    conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_SECONDS, factory=Snapshot)
+    conn.execute("BEGIN")
+    # The WAL snapshot is taken at the first read, not at BEGIN
+    conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    return conn
+
+def with_snapshot(func):
+    """Run func with its db_file argument swapped for a Snapshot held for the whole call"""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        db_file = bound.arguments['db_file']
+        snapshot = open_snapshot(db_file)
+        bound.arguments['db_file'] = snapshot
+        try:
+            return func(*bound.args, **bound.kwargs)
+        finally:
+            if snapshot is not db_file:
+                snapshot.release()
+
+    return wrapper
+
+def create_tables(c):
+    """Create the data version table"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER,
+        updated_at TEXT
+    )
+    """)
+
+def get_data_version(db_file):
+    """Get the published data version (0 if nothing was ever ingested)"""
+    conn = connect(db_file)
+    try:
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+    return row[0] if row else 0
+
+def bump_data_version(c):
+    """Increment the data version inside the current write transaction"""
+    c.execute("""
+    INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, datetime('now'))
+    ON CONFLICT(id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+    """)
+    c.execute("SELECT version FROM data_version WHERE id = 1")
+    return c.fetchone()[0]
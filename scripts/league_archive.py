@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+import sqlite3
+import requests
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import db
+import output
+import utl
+
+# ======================================================================== #
+#                                                                          #
+#   All-time league archive. Follows Sleeper's previous_league_id chain    #
+#   back through every season, stores every completed game, and keeps an   #
+#   owner x owner head_to_head table (both directions) up to date as       #
+#   games arrive, so all-time records and rivalries are primary-key        #
+#   reads instead of scans over every season's matchups.                   #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+DB_FILE = utl.DB_FILE_25
+LEAGUE_ID = utl.LEAGUE_ID_2025
+MAX_WEEK = 18  # Regular season plus playoffs
+
+def fetch_json(url):
+    """GET a Sleeper API URL"""
+    return requests.get(url).json()
+
+def get_league_chain(league_id):
+    """Every season of a league, newest first, by following previous_league_id"""
+    chain = []
+    seen = set()
+    while league_id and league_id != "0" and league_id not in seen:
+        seen.add(league_id)
+        league = fetch_json(f"https://api.sleeper.app/v1/league/{league_id}")
+        if not league:
+            break
+        chain.append(league)
+        league_id = league.get('previous_league_id')
+    return chain
+
+def canonical_owner(owner_id):
+    """Map an owner ID to the person's current *_OWNER_ID"""
+    return utl.OWNER_ALIASES.get(owner_id, owner_id)
+
+def fetch_seasons(chain, workers=1):
+    """Fetch users, rosters and every week's matchups for all seasons concurrently"""
+    urls = []
+    for league in chain:
+        base = f"https://api.sleeper.app/v1/league/{league['league_id']}"
+        urls.append((league['league_id'], 'users', f"{base}/users"))
+        urls.append((league['league_id'], 'rosters', f"{base}/rosters"))
+        for week in range(1, MAX_WEEK + 1):
+            urls.append((league['league_id'], week, f"{base}/matchups/{week}"))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        responses = pool.map(lambda item: fetch_json(item[2]), urls)
+        seasons = defaultdict(dict)  # {league_id: {'users': [...], 'rosters': [...], week: [...]}}
+        for (league_id, key, _), data in zip(urls, responses):
+            seasons[league_id][key] = data or []
+
+    return seasons
+
+def get_current_week():
+    """(season, week) of the NFL right now from the Sleeper API"""
+    state = fetch_json("https://api.sleeper.app/v1/state/nfl") or {}
+    return str(state.get('season')), state.get('week') or 0
+
+def last_completed_week(league, current_week=None):
+    """
+    Last week of a season whose games are final. For a season still in
+    progress that is the week before the current NFL week, so games being
+    played today are not stored as results.
+    """
+    if current_week is None or league.get('status') == 'complete':
+        return MAX_WEEK
+    return min(MAX_WEEK, current_week - 1)
+
+def season_games(league, season_data, current_week=None):
+    """
+    Completed games of one season as dicts keyed like the archive_games table.
+    Pass current_week for the season being played right now.
+    """
+    roster_owner = {r['roster_id']: canonical_owner(r['owner_id']) for r in season_data['rosters'] if r.get('owner_id')}
+    playoff_start = (league.get('settings') or {}).get('playoff_week_start') or MAX_WEEK + 1
+
+    games = []
+    for week in range(1, last_completed_week(league, current_week) + 1):
+        groups = defaultdict(list)
+        for matchup in season_data.get(week, []):
+            if matchup.get('matchup_id') is not None and matchup['roster_id'] in roster_owner:
+                groups[matchup['matchup_id']].append(matchup)
+
+        for group, (m1, m2) in ((g, ms) for g, ms in groups.items() if len(ms) == 2):
+            points1 = m1.get('points') or 0
+            points2 = m2.get('points') or 0
+            if not points1 or not points2:
+                continue  # Not played yet
+            games.append({
+                'league_id': league['league_id'],
+                'season': int(league['season']),
+                'week': week,
+                'matchup_id_group': group,
+                'owner1': roster_owner[m1['roster_id']],
+                'points1': points1,
+                'owner2': roster_owner[m2['roster_id']],
+                'points2': points2,
+                'is_playoff': int(week >= playoff_start)
+            })
+
+    return games
+
+def create_tables(c):
+    """Create the archive tables"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS archive_leagues (
+        league_id TEXT PRIMARY KEY,
+        season INTEGER,
+        name TEXT,
+        previous_league_id TEXT
+    )
+    """)
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS archive_owners (
+        owner_id TEXT PRIMARY KEY,
+        display_name TEXT,
+        last_season INTEGER
+    )
+    """)
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS archive_games (
+        league_id TEXT,
+        season INTEGER,
+        week INTEGER,
+        matchup_id_group INTEGER,
+        owner1 TEXT,
+        points1 REAL,
+        owner2 TEXT,
+        points2 REAL,
+        is_playoff INTEGER,
+        PRIMARY KEY (league_id, week, matchup_id_group)
+    )
+    """)
+
+    # One row per ordered (owner, opponent) pair, kept in sync with archive_games
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS head_to_head (
+        owner_id TEXT,
+        opponent_id TEXT,
+        games INTEGER,
+        wins INTEGER,
+        losses INTEGER,
+        ties INTEGER,
+        points_for REAL,
+        points_against REAL,
+        streak INTEGER,
+        longest_win_streak INTEGER,
+        longest_loss_streak INTEGER,
+        last_season INTEGER,
+        last_week INTEGER,
+        PRIMARY KEY (owner_id, opponent_id)
+    )
+    """)
+
+def apply_game(c, owner, opponent, points_for, points_against, season, week):
+    """Fold one game into owner's head-to-head row against opponent"""
+    c.execute("""
+        SELECT games, wins, losses, ties, points_for, points_against,
+               streak, longest_win_streak, longest_loss_streak
+        FROM head_to_head WHERE owner_id = ? AND opponent_id = ?
+    """, (owner, opponent))
+    row = c.fetchone() or (0, 0, 0, 0, 0.0, 0.0, 0, 0, 0)
+    games, wins, losses, ties, pf, pa, streak, longest_win, longest_loss = row
+
+    # Streak is +n for n straight wins, -n for n straight losses
+    if points_for > points_against:
+        wins += 1
+        streak = streak + 1 if streak > 0 else 1
+    elif points_for < points_against:
+        losses += 1
+        streak = streak - 1 if streak < 0 else -1
+    else:
+        ties += 1
+        streak = 0
+
+    c.execute("""
+    INSERT OR REPLACE INTO head_to_head
+    (owner_id, opponent_id, games, wins, losses, ties, points_for, points_against,
+     streak, longest_win_streak, longest_loss_streak, last_season, last_week)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        owner, opponent, games + 1, wins, losses, ties,
+        pf + points_for, pa + points_against,
+        streak, max(longest_win, streak), max(longest_loss, -streak),
+        season, week
+    ))
+
+def apply_pair_game(c, game):
+    """Fold a game into both directions of the pair's head-to-head rows"""
+    apply_game(c, game['owner1'], game['owner2'], game['points1'], game['points2'], game['season'], game['week'])
+    apply_game(c, game['owner2'], game['owner1'], game['points2'], game['points1'], game['season'], game['week'])
+
+def rebuild_pair(c, owner1, owner2):
+    """Replay every archived game between two owners in order"""
+    c.execute("""
+        DELETE FROM head_to_head
+        WHERE (owner_id = ? AND opponent_id = ?) OR (owner_id = ? AND opponent_id = ?)
+    """, (owner1, owner2, owner2, owner1))
+
+    c.execute("""
+        SELECT season, week, owner1, points1, owner2, points2
+        FROM archive_games
+        WHERE (owner1 = ? AND owner2 = ?) OR (owner1 = ? AND owner2 = ?)
+        ORDER BY season, week
+    """, (owner1, owner2, owner2, owner1))
+    for season, week, o1, p1, o2, p2 in c.fetchall():
+        apply_pair_game(c, {'season': season, 'week': week, 'owner1': o1, 'points1': p1, 'owner2': o2, 'points2': p2})
+
+def store_games(c, games):
+    """
+    Upsert games into archive_games and bring head_to_head up to date.
+    New games later than a pair's last game are applied incrementally;
+    corrections and out-of-order games replay just that pair.
+    Returns the number of games added or changed.
+    """
+    columns = ('season', 'owner1', 'points1', 'owner2', 'points2', 'is_playoff')
+    changed = 0
+    rebuild = set()
+
+    for game in sorted(games, key=lambda g: (g['season'], g['week'])):
+        c.execute(f"""
+            SELECT {', '.join(columns)} FROM archive_games
+            WHERE league_id = ? AND week = ? AND matchup_id_group = ?
+        """, (game['league_id'], game['week'], game['matchup_id_group']))
+        existing = c.fetchone()
+        if existing == tuple(game[col] for col in columns):
+            continue
+
+        c.execute("""
+        INSERT OR REPLACE INTO archive_games
+        (league_id, season, week, matchup_id_group, owner1, points1, owner2, points2, is_playoff)
+        VALUES (:league_id, :season, :week, :matchup_id_group, :owner1, :points1, :owner2, :points2, :is_playoff)
+        """, game)
+        changed += 1
+
+        pair = tuple(sorted((game['owner1'], game['owner2'])))
+        if existing is not None:
+            rebuild.add(pair)
+            rebuild.add(tuple(sorted((existing[1], existing[3]))))
+            continue
+
+        c.execute("""
+            SELECT last_season, last_week FROM head_to_head WHERE owner_id = ? AND opponent_id = ?
+        """, (game['owner1'], game['owner2']))
+        last = c.fetchone()
+        if pair in rebuild or (last is not None and tuple(last) > (game['season'], game['week'])):
+            rebuild.add(pair)
+        else:
+            apply_pair_game(c, game)
+
+    for owner1, owner2 in rebuild:
+        rebuild_pair(c, owner1, owner2)
+
+    return changed
+
+def sync(db_file=DB_FILE, league_id=LEAGUE_ID, workers=utl.NUM_WORKERS):
+    """Fetch every season in the league's history and update the archive"""
+    print("Following previous_league_id chain...")
+    chain = get_league_chain(league_id)
+    print(f"Found {len(chain)} seasons: {', '.join(str(league['season']) for league in chain)}")
+
+    print("Fetching all seasons...")
+    seasons = fetch_seasons(chain, workers)
+    current_season, current_week = get_current_week()
+
+    db_connection = db.connect_writer(db_file)
+    c = db_connection.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        create_tables(c)
+        db.create_tables(c)
+
+        games = []
+        # Oldest season first so the newest display name wins
+        for league in reversed(chain):
+            season = int(league['season'])
+            c.execute("""
+            INSERT OR REPLACE INTO archive_leagues (league_id, season, name, previous_league_id)
+            VALUES (?, ?, ?, ?)
+            """, (league['league_id'], season, league.get('name'), league.get('previous_league_id')))
+
+            for user in seasons[league['league_id']]['users']:
+                c.execute("""
+                INSERT INTO archive_owners (owner_id, display_name, last_season) VALUES (?, ?, ?)
+                ON CONFLICT(owner_id) DO UPDATE SET display_name = excluded.display_name, last_season = excluded.last_season
+                WHERE excluded.last_season >= last_season
+                """, (canonical_owner(user['user_id']), user.get('display_name'), season))
+
+            in_progress = str(league['season']) == current_season
+            games.extend(season_games(league, seasons[league['league_id']], current_week if in_progress else None))
+
+        changed = store_games(c, games)
+        if changed:
+            db.bump_data_version(c)
+        c.execute("COMMIT")
+    except BaseException:
+        c.execute("ROLLBACK")
+        raise
+    finally:
+        db_connection.close()
+
+    print(f"Archive updated: {changed} new or corrected games of {len(games)}.")
+
+def get_owner_names(db_file):
+    """Names by owner ID: the person from utl.OWNER_NAMES, else the latest display name"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+    try:
+        c.execute("SELECT owner_id, display_name FROM archive_owners")
+        rows = c.fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # Archive never synced
+    names = {owner_id: utl.OWNER_NAMES.get(owner_id, display_name) for owner_id, display_name in rows}
+    conn.close()
+    return names
+
+def resolve_owner(db_file, owner):
+    """Get the canonical owner ID for an owner ID, person name or display name"""
+    owner_id = canonical_owner(owner)
+    names = get_owner_names(db_file)
+    if owner_id in names:
+        return owner_id
+    for candidate, name in names.items():
+        if name and name.lower() == owner.lower():
+            return candidate
+    raise ValueError(f"Unknown owner {owner}")
+
+def get_all_time_records(db_file):
+    """All-time totals for each owner from the head-to-head index"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+    try:
+        c.execute("""
+            SELECT owner_id, SUM(games), SUM(wins), SUM(losses), SUM(ties),
+                   SUM(points_for), SUM(points_against)
+            FROM head_to_head
+            GROUP BY owner_id
+        """)
+        rows = c.fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # Archive never synced
+    conn.close()
+    return rows
+
+def get_rivalries(db_file, owner_id, opponent_id=None):
+    """Head-to-head rows for an owner (or one pair), read straight from the index"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+    query = """
+        SELECT opponent_id, games, wins, losses, ties, points_for, points_against,
+               streak, longest_win_streak, longest_loss_streak, last_season, last_week
+        FROM head_to_head WHERE owner_id = ?
+    """
+    params = (owner_id,)
+    if opponent_id is not None:
+        query += " AND opponent_id = ?"
+        params += (opponent_id,)
+    try:
+        c.execute(query, params)
+        rows = c.fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # Archive never synced
+    conn.close()
+    return rows
+
+def all_time_records(rows, names):
+    """Build all-time record rows, best win % first"""
+    records = []
+    for owner_id, games, wins, losses, ties, points_for, points_against in rows:
+        records.append({
+            'owner_id': owner_id,
+            'name': names.get(owner_id, owner_id),
+            'games': games,
+            'wins': wins,
+            'losses': losses,
+            'ties': ties,
+            'win_pct': (wins + 0.5 * ties) / games if games else 0,
+            'points_for': points_for,
+            'points_against': points_against
+        })
+
+    records.sort(key=lambda x: (x['win_pct'], x['points_for']), reverse=True)
+    return records
+
+def rivalry_records(owner_id, rows, names):
+    """Build one owner's head-to-head rows, most played first"""
+    records = []
+    for (opponent_id, games, wins, losses, ties, points_for, points_against,
+         streak, longest_win, longest_loss, last_season, last_week) in rows:
+        records.append({
+            'owner_id': owner_id,
+            'name': names.get(owner_id, owner_id),
+            'opponent_id': opponent_id,
+            'opponent_name': names.get(opponent_id, opponent_id),
+            'games': games,
+            'wins': wins,
+            'losses': losses,
+            'ties': ties,
+            'points_for': points_for,
+            'points_against': points_against,
+            'streak': streak,
+            'longest_win_streak': longest_win,
+            'longest_loss_streak': longest_loss,
+            'last_season': last_season,
+            'last_week': last_week
+        })
+
+    records.sort(key=lambda x: (x['games'], x['wins'] - x['losses']), reverse=True)
+    return records
+
+def format_streak(streak):
+    if streak > 0:
+        return f"W{streak}"
+    if streak < 0:
+        return f"L{-streak}"
+    return "-"
+
+@output.rich_renderer("all_time_records")
+def print_all_time_records(rows):
+    """Print all-time standings table"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    table = Table(title="All-Time Records", show_header=True, header_style="bold magenta")
+    table.add_column("Rank", justify="center", style="bold")
+    table.add_column("Owner", style="cyan")
+    table.add_column("Record", justify="center")
+    table.add_column("Win %", justify="center")
+    table.add_column("PF", justify="center")
+    table.add_column("PA", justify="center", style="dim")
+
+    for rank, row in enumerate(rows, 1):
+        record = f"{row['wins']}-{row['losses']}"
+        if row['ties']:
+            record += f"-{row['ties']}"
+        table.add_row(
+            str(rank),
+            row['name'],
+            record,
+            f"{row['win_pct']:.3f}",
+            f"{row['points_for']:.1f}",
+            f"{row['points_against']:.1f}"
+        )
+
+    console.print(table)
+
+@output.rich_renderer("rivalries")
+def print_rivalries(rows):
+    """Print head-to-head table for one owner"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    title = f"Head-to-Head: {rows[0]['name']}" if rows else "Head-to-Head"
+    table = Table(title=title, show_header=True, header_style="bold magenta")
+    table.add_column("Opponent", style="cyan")
+    table.add_column("Record", justify="center", style="bold")
+    table.add_column("PF", justify="center")
+    table.add_column("PA", justify="center")
+    table.add_column("Streak", justify="center")
+    table.add_column("Best / Worst Run", justify="center", style="dim")
+    table.add_column("Last Met", justify="center", style="dim")
+
+    for row in rows:
+        record = f"{row['wins']}-{row['losses']}"
+        if row['ties']:
+            record += f"-{row['ties']}"
+        style = "green" if row['wins'] > row['losses'] else "red" if row['wins'] < row['losses'] else None
+        table.add_row(
+            row['opponent_name'],
+            record,
+            f"{row['points_for']:.1f}",
+            f"{row['points_against']:.1f}",
+            format_streak(row['streak']),
+            f"W{row['longest_win_streak']} / L{row['longest_loss_streak']}",
+            f"{row['last_season']} wk {row['last_week']}",
+            style=style
+        )
+
+    console.print(table)
+
+@db.with_snapshot
+def main(db_file=DB_FILE, owner=None, opponent=None, out=None):
+    out = out or output.RichOutput()
+
+    names = get_owner_names(db_file)
+    if not names:
+        out.log("Archive is empty. Run archive sync first.")
+        return
+
+    if owner is None:
+        out.write("all_time_records", all_time_records(get_all_time_records(db_file), names))
+        return
+
+    owner_id = resolve_owner(db_file, owner)
+    opponent_id = resolve_owner(db_file, opponent) if opponent else None
+    out.write("rivalries", rivalry_records(owner_id, get_rivalries(db_file, owner_id, opponent_id), names))
+
+if __name__ == "__main__":
+    main()
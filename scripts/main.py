@@ -1,26 +1,244 @@
 #!/usr/bin/env python3
-import requests
-import sqlite3
-import json
+from typing import List, Optional
+
+import typer
 
 import utl
-import setup_db
-import win_probability
-import all_play_standings
-import team_consistency
 
+# ======================================================================== #
+#                                                                          #
+#   Command line entry point. Each subcommand imports the analysis it      #
+#   runs (and with it numpy / rich / requests) only when it is invoked,    #
+#   so --help and cheap subcommands start fast. See bench_startup.py.      #
+#                                                                          #
+# ======================================================================== #
 
-def main() -> None:
-    # Connect to the SQLite Datbase
-    db_connection = sqlite3.connect(utl.DB_FILE_25)
-    c = db_connection.cursor()
 
-    setup_db.main()
-    win_probability.main()
-    all_play_standings.main()
-    team_consistency.main()
+app = typer.Typer(
+    help="Sleeper fantasy football league tools.",
+    no_args_is_help=True,
+    rich_markup_mode=None,
+    pretty_exceptions_enable=False,
+)
+
+
+@app.callback()
+def options(
+    ctx: typer.Context,
+    league: Optional[str] = typer.Option(None, help="Sleeper league ID (defaults to the season's league)."),
+    season: int = typer.Option(utl.CURRENT_SEASON, help="Season year."),
+    db: Optional[str] = typer.Option(None, help="SQLite DB path (defaults to sleeper_league_<yy>.db)."),
+    sims: int = typer.Option(utl.NUM_SIMULATIONS, help="Simulations per matchup."),
+    workers: int = typer.Option(utl.NUM_WORKERS, help="Concurrent API requests."),
+    fmt: str = typer.Option("rich", "--format", help="Output format: rich, json, ndjson or csv."),
+    out_dir: Optional[str] = typer.Option(None, help="Directory for file output (defaults to output/<league>)."),
+) -> None:
+    """Shared options for every subcommand."""
+    if league is None:
+        if season not in utl.LEAGUE_IDS:
+            raise typer.BadParameter(f"No league ID known for season {season}, pass --league", param_hint="--league")
+        league = utl.LEAGUE_IDS[season]
+
+    import output
+
+    try:
+        out = output.get_output(fmt, out_dir or f"output/{league}")
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--format")
+
+    ctx.obj = {
+        'league_id': league,
+        'season': season,
+        'db_file': db or utl.db_file_for_season(season),
+        'n_sims': sims,
+        'workers': workers,
+        'out': out,
+    }
+
+
+@app.command()
+def sync(ctx: typer.Context) -> None:
+    """Re-ingest players, users, rosters and matchups into the DB."""
+    import setup_db
+
+    opts = ctx.obj
+    setup_db.main(opts['db_file'], opts['league_id'], opts['workers'])
+
+
+@app.command()
+def simulate(
+    ctx: typer.Context,
+    model: str = typer.Option(
+        "bootstrap",
+        help="Win probability model: bootstrap, recency, gaussian, skewnormal, kde (sampled), exact, elo or normal."
+    ),
+    seed: Optional[int] = typer.Option(None, help="Random seed for reproducible simulations."),
+    cache: bool = typer.Option(True, help="Reuse results of earlier runs with identical inputs."),
+) -> None:
+    """Win probabilities and projections for the rest of the season."""
+    import win_probability
+
+    if model not in win_probability.MODELS:
+        raise typer.BadParameter(f"expected one of {', '.join(win_probability.MODELS)}", param_hint="--model")
+    opts = ctx.obj
+    win_probability.main(opts['db_file'], opts['league_id'], opts['n_sims'], opts['workers'], opts['out'],
+                         model, seed, cache)
+
+
+@app.command("all-play")
+def all_play(ctx: typer.Context) -> None:
+    """All-play true standings and luck index."""
+    import all_play_standings
+
+    all_play_standings.main(ctx.obj['db_file'], ctx.obj['league_id'], ctx.obj['out'])
+
+
+@app.command("schedule-luck")
+def schedule_luck_cmd(
+    ctx: typer.Context,
+    schedules: int = typer.Option(10000, help="Random schedules to replay the season under."),
+    mode: str = typer.Option("shuffle", help="shuffle (relabel the real schedule) or random (random weekly pairings)."),
+    seed: Optional[int] = typer.Option(None, help="Random seed for reproducible schedules."),
+) -> None:
+    """Distribution of records each team could have had under other schedules."""
+    import schedule_luck
+
+    if mode not in schedule_luck.SCHEDULE_MODES:
+        raise typer.BadParameter(f"expected one of {', '.join(schedule_luck.SCHEDULE_MODES)}", param_hint="--mode")
+    schedule_luck.main(ctx.obj['db_file'], schedules, mode, seed, ctx.obj['out'])
+
+
+@app.command()
+def ratings(
+    ctx: typer.Context,
+    rebuild: bool = typer.Option(False, help="Recompute ratings from every ingested week."),
+) -> None:
+    """Elo and Bayesian strength ratings for each team."""
+    import team_ratings
+
+    team_ratings.main(ctx.obj['db_file'], ctx.obj['league_id'], rebuild, ctx.obj['out'])
+
+
+@app.command("win-matrix")
+def win_matrix_cmd(
+    ctx: typer.Context,
+    check: bool = typer.Option(False, help="Compare the Monte Carlo estimate against the exact matrix."),
+) -> None:
+    """Exact head-to-head win probability for every pair of teams."""
+    import win_matrix
+
+    opts = ctx.obj
+    win_matrix.main(opts['db_file'], opts['league_id'], opts['n_sims'], check, opts['out'])
 
-if __name__ == "__main__":
-    main()
 
+@app.command()
+def consistency(ctx: typer.Context) -> None:
+    """Team consistency rankings."""
+    import team_consistency
 
+    team_consistency.main(ctx.obj['db_file'], ctx.obj['league_id'], ctx.obj['out'])
+
+
+@app.command("what-if")
+def what_if_cmd(
+    ctx: typer.Context,
+    team: str = typer.Argument(..., help="Team making the change (owner ID or display name)."),
+    give: List[str] = typer.Option([], help="Player sent away in a trade (repeatable)."),
+    get: List[str] = typer.Option([], help="Player received in a trade (repeatable)."),
+    partner: Optional[str] = typer.Option(None, help="Trade partner (owner ID or display name)."),
+    bench: List[str] = typer.Option([], help="Starter to sit (repeatable)."),
+    seed: Optional[int] = typer.Option(None, help="Random seed for reproducible simulations."),
+) -> None:
+    """Change in expected wins and playoff odds from a trade or lineup change."""
+    import what_if
+
+    opts = ctx.obj
+    db_file = opts['db_file']
+    try:
+        team = what_if.resolve_team(db_file, team)
+        give = [what_if.resolve_player(db_file, p) for p in give]
+        get = [what_if.resolve_player(db_file, p) for p in get]
+        bench = [what_if.resolve_player(db_file, p) for p in bench]
+
+        changes = []
+        if give or get:
+            if partner is None:
+                raise typer.BadParameter("A trade needs --partner", param_hint="--partner")
+            changes.append(what_if.trade(team, give, what_if.resolve_team(db_file, partner), get))
+        if bench:
+            changes.append(what_if.bench(team, bench))
+        if not changes:
+            raise typer.BadParameter("Nothing to analyze, pass --give/--get or --bench")
+
+        what_if.main(what_if.merge_changes(*changes), db_file, opts['league_id'],
+                     opts['n_sims'], opts['workers'], opts['out'], seed)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+
+@app.command("cache")
+def cache_cmd(
+    ctx: typer.Context,
+    clear: bool = typer.Option(False, help="Delete every cached simulation result first."),
+) -> None:
+    """Simulation cache size and hit-rate statistics."""
+    import sim_cache
+
+    sim_cache.main(clear, ctx.obj['out'])
+
+
+archive_app = typer.Typer(help="All-time league archive across every season.", no_args_is_help=True)
+app.add_typer(archive_app, name="archive")
+
+
+@archive_app.command("sync")
+def archive_sync(ctx: typer.Context) -> None:
+    """Follow previous_league_id back through every season and update the archive."""
+    import league_archive
+
+    opts = ctx.obj
+    league_archive.sync(opts['db_file'], opts['league_id'], opts['workers'])
+
+
+@archive_app.command("records")
+def archive_records(ctx: typer.Context) -> None:
+    """All-time record for every owner."""
+    import league_archive
+
+    league_archive.main(ctx.obj['db_file'], out=ctx.obj['out'])
+
+
+@archive_app.command("rivalry")
+def archive_rivalry(
+    ctx: typer.Context,
+    owner: str = typer.Argument(..., help="Owner ID, name or display name."),
+    opponent: Optional[str] = typer.Argument(None, help="Limit to one opponent."),
+) -> None:
+    """All-time head-to-head records for an owner."""
+    import league_archive
+
+    try:
+        league_archive.main(ctx.obj['db_file'], owner, opponent, ctx.obj['out'])
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+
+@app.command()
+def report(
+    ctx: typer.Context,
+    refresh: bool = typer.Option(False, "--sync/--no-sync", help="Re-ingest before running the analyses."),
+) -> None:
+    """Run every analysis (optionally after a sync)."""
+    # Plain function callbacks get no defaults filled in, so pass every option by name
+    if refresh:
+        ctx.invoke(sync, ctx=ctx)
+    ctx.invoke(simulate, ctx=ctx, model="bootstrap", seed=None, cache=True)
+    ctx.invoke(all_play, ctx=ctx)
+    ctx.invoke(consistency, ctx=ctx)
+
+
+def main() -> None:
+    app()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+
+# ======================================================================== #
+#                                                                          #
+#   Output layer shared by every report. Analyses hand their results to    #
+#   an output as plain records (dicts); Rich tables are one renderer,      #
+#   the file outputs stream records to JSON / NDJSON / CSV for batch       #
+#   runs without importing or building anything from Rich.                 #
+#                                                                          #
+# ======================================================================== #
+
+
+# Rich renderers by report name, registered with @rich_renderer
+RICH_RENDERERS = {}
+
+def rich_renderer(report):
+    """Register a function as the Rich renderer for a report"""
+    def register(func):
+        RICH_RENDERERS[report] = func
+        return func
+    return register
+
+class RichOutput:
+    """Renders each report on the console with its registered Rich renderer"""
+
+    def __init__(self):
+        self.console = None
+
+    def log(self, message=""):
+        if self.console is None:
+            from rich.console import Console
+            self.console = Console()
+        self.console.print(message)
+
+    def write(self, report, records):
+        RICH_RENDERERS[report](list(records))
+
+class FileOutput:
+    """Streams each report to <out_dir>/<report>.<extension>, progress is dropped"""
+    extension = None
+
+    def __init__(self, out_dir="output"):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+    def log(self, message=""):
+        pass
+
+    def path(self, report):
+        return os.path.join(self.out_dir, f"{report}.{self.extension}")
+
+    def write(self, report, records):
+        with open(self.path(report), "w", newline="") as f:
+            self.dump(records, f)
+
+    def dump(self, records, f):
+        raise NotImplementedError
+
+class JsonOutput(FileOutput):
+    """One JSON array per report"""
+    extension = "json"
+
+    def dump(self, records, f):
+        f.write("[")
+        for i, record in enumerate(records):
+            f.write(",\n" if i else "\n")
+            json.dump(record, f)
+        f.write("\n]\n")
+
+class NdjsonOutput(FileOutput):
+    """One JSON object per line"""
+    extension = "ndjson"
+
+    def dump(self, records, f):
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+class CsvOutput(FileOutput):
+    """CSV with a header taken from the first record"""
+    extension = "csv"
+
+    def dump(self, records, f):
+        writer = None
+        for record in records:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(record))
+                writer.writeheader()
+            writer.writerow(record)
+
+OUTPUT_FORMATS = {
+    "rich": RichOutput,
+    "json": JsonOutput,
+    "ndjson": NdjsonOutput,
+    "csv": CsvOutput,
+}
+
+def get_output(fmt="rich", out_dir="output"):
+    """Create the output for a format name"""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {fmt!r}, expected one of {', '.join(OUTPUT_FORMATS)}")
+    if fmt == "rich":
+        return RichOutput()
+    return OUTPUT_FORMATS[fmt](out_dir)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+import time
+import numpy as np
+from collections import defaultdict
+import db
+import output
+import standings
+import utl
+
+# ======================================================================== #
+#                                                                          #
+#   Replays the season's real weekly scores under thousands of random      #
+#   schedules to show how much each team's record owes to its schedule.    #
+#   Schedules are index arrays into the weeks x teams score matrix, so     #
+#   every schedule is scored at once with numpy instead of in a loop.      #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+DB_FILE = utl.DB_FILE_25
+NUM_SCHEDULES = 10000
+CHUNK_SIZE = 2000  # Schedules scored per batch, bounds memory use
+SCHEDULE_MODES = ("shuffle", "random")
+
+def get_score_matrix(db_file):
+    """
+    Get the weeks x teams score matrix and the real opponent of each team
+    for every completed week (one where every team has a score and opponent).
+    """
+    scores, opponents, _, teams, team_names = standings.get_score_matrix(db_file)
+    complete = ~np.isnan(scores).any(axis=1) & (opponents >= 0).all(axis=1)
+    return scores[complete], opponents[complete], teams, team_names
+
+def random_opponents(template, n_schedules, rng, mode="shuffle"):
+    """
+    Opponent index arrays of shape (n_schedules, weeks, teams).
+    shuffle: the league's real schedule with the teams randomly relabelled,
+             so every schedule keeps the league's rotation.
+    random:  an independent random pairing of the teams every week.
+    """
+    n_weeks, n_teams = template.shape
+
+    if mode == "shuffle":
+        # perms[s, slot] is the team playing the real schedule's slot
+        perms = np.argsort(rng.random((n_schedules, n_teams)), axis=1)
+        slots = np.argsort(perms, axis=1)
+        opponent_slots = template[np.arange(n_weeks)[None, :, None], slots[:, None, :]]
+        return np.take_along_axis(perms[:, None, :], opponent_slots, axis=2)
+
+    if mode == "random":
+        perms = np.argsort(rng.random((n_schedules, n_weeks, n_teams)), axis=2)
+        home, away = perms[..., 0::2], perms[..., 1::2]
+        opponents = np.empty_like(perms)
+        np.put_along_axis(opponents, home, away, axis=2)
+        np.put_along_axis(opponents, away, home, axis=2)
+        return opponents
+
+    raise ValueError(f"Unknown schedule mode {mode!r}, expected one of {', '.join(SCHEDULE_MODES)}")
+
+def schedule_wins(scores, opponents):
+    """Wins (ties count half) for each team under each schedule, shape (schedules, teams)"""
+    n_weeks = scores.shape[0]
+    opponent_scores = scores[np.arange(n_weeks)[None, :, None], opponents]
+    team_scores = scores[None, :, :]
+    return (team_scores > opponent_scores).sum(axis=1) + 0.5 * (team_scores == opponent_scores).sum(axis=1)
+
+def simulate_schedules(scores, template, n_schedules=NUM_SCHEDULES, mode="shuffle", seed=None):
+    """Win totals for each team under n_schedules random schedules"""
+    rng = np.random.default_rng(seed)
+    wins = np.empty((n_schedules, scores.shape[1]))
+
+    for start in range(0, n_schedules, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, n_schedules)
+        opponents = random_opponents(template, stop - start, rng, mode)
+        wins[start:stop] = schedule_wins(scores, opponents)
+
+    return wins
+
+def calculate_schedule_luck(scores, template, simulated_wins):
+    """Actual wins, win distribution and the percentile of the actual record for each team"""
+    n_weeks = scores.shape[0]
+    actual_wins = schedule_wins(scores, template[None])[0]
+
+    # Half wins from ties are counted in half-win buckets
+    half_wins = np.rint(simulated_wins * 2).astype(np.intp)
+    distribution = np.stack([
+        np.bincount(half_wins[:, t], minlength=2 * n_weeks + 1) for t in range(scores.shape[1])
+    ]) / len(simulated_wins)
+
+    below = (simulated_wins < actual_wins).mean(axis=0)
+    equal = (simulated_wins == actual_wins).mean(axis=0)
+
+    return {
+        'actual_wins': actual_wins,
+        'mean_wins': simulated_wins.mean(axis=0),
+        'p05_wins': np.percentile(simulated_wins, 5, axis=0),
+        'p95_wins': np.percentile(simulated_wins, 95, axis=0),
+        'percentile': below + 0.5 * equal,
+        'distribution': distribution
+    }
+
+def schedule_luck_records(luck, teams, team_names):
+    """Build schedule luck records, luckiest (highest percentile) first"""
+    rows = []
+    for t, team in enumerate(teams):
+        rows.append({
+            'owner_id': team,
+            'name': team_names[team],
+            'actual_wins': float(luck['actual_wins'][t]),
+            'mean_wins': float(luck['mean_wins'][t]),
+            'p05_wins': float(luck['p05_wins'][t]),
+            'p95_wins': float(luck['p95_wins'][t]),
+            'percentile': float(luck['percentile'][t])
+        })
+
+    rows.sort(key=lambda x: x['percentile'], reverse=True)
+    return rows
+
+def distribution_records(luck, teams, team_names):
+    """Build one record per team and possible win total with its probability"""
+    for t, team in enumerate(teams):
+        for half_wins, probability in enumerate(luck['distribution'][t]):
+            if probability > 0:
+                yield {
+                    'owner_id': team,
+                    'name': team_names[team],
+                    'wins': half_wins / 2,
+                    'probability': float(probability)
+                }
+
+@output.rich_renderer("schedule_luck")
+def print_schedule_luck(rows):
+    """Print schedule luck table"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    table = Table(title="Schedule Luck (Actual Record vs Random Schedules)", show_header=True, header_style="bold magenta")
+    table.add_column("Team", style="cyan", no_wrap=False)
+    table.add_column("Actual Wins", justify="center")
+    table.add_column("Avg Wins", justify="center")
+    table.add_column("90% Range", justify="center")
+    table.add_column("Percentile", justify="center", style="bold")
+
+    for row in rows:
+        percentile = row['percentile']
+        if percentile > 0.8:
+            style = "bold green"
+        elif percentile > 0.6:
+            style = "green"
+        elif percentile >= 0.4:
+            style = "white"
+        elif percentile >= 0.2:
+            style = "yellow"
+        else:
+            style = "bold red"
+
+        table.add_row(
+            row['name'],
+            f"{row['actual_wins']:g}",
+            f"{row['mean_wins']:.2f}",
+            f"{row['p05_wins']:g}-{row['p95_wins']:g}",
+            f"{percentile*100:.0f}%",
+            style=style
+        )
+
+    console.print(table)
+
+@output.rich_renderer("schedule_luck_distribution")
+def print_schedule_distribution(rows):
+    """Print each team's win distribution as a bar chart"""
+    from rich.console import Console
+
+    console = Console()
+    bars = " ▁▂▃▄▅▆▇█"
+
+    by_team = defaultdict(dict)
+    names = {}
+    for row in rows:
+        by_team[row['owner_id']][row['wins']] = row['probability']
+        names[row['owner_id']] = row['name']
+
+    # One column per win total any team reached, half wins from ties included
+    totals = sorted({w for probs in by_team.values() for w in probs})
+    if not totals:
+        return
+    console.print("\n[bold cyan]Win Distributions ({:g} to {:g} wins)[/bold cyan]".format(totals[0], totals[-1]))
+    for owner_id, probs in by_team.items():
+        peak = max(probs.values())
+        chart = "".join(
+            bars[round(probs.get(w, 0) / peak * (len(bars) - 1))]
+            for w in totals
+        )
+        console.print(f"{names[owner_id]:20} {chart}")
+
+@db.with_snapshot
+def main(db_file=DB_FILE, n_schedules=NUM_SCHEDULES, mode="shuffle", seed=None, out=None):
+    out = out or output.RichOutput()
+
+    out.log("[bold magenta]Schedule Luck Analysis[/bold magenta]\n")
+
+    scores, template, teams, team_names = get_score_matrix(db_file)
+    if len(scores) == 0:
+        out.log("No completed weeks found.")
+        return
+
+    out.log(f"[yellow]Replaying {scores.shape[0]} weeks under {n_schedules:,} {mode} schedules...[/yellow]")
+    start = time.perf_counter()
+    simulated_wins = simulate_schedules(scores, template, n_schedules, mode, seed)
+    luck = calculate_schedule_luck(scores, template, simulated_wins)
+    out.log(f"[dim]Simulated in {time.perf_counter() - start:.2f}s[/dim]\n")
+
+    out.write("schedule_luck", schedule_luck_records(luck, teams, team_names))
+    out.write("schedule_luck_distribution", distribution_records(luck, teams, team_names))
+
+if __name__ == "__main__":
+    main()
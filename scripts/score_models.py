@@ -0,0 +1,185 @@
+import numpy as np
+
+# ======================================================================== #
+#                                                                          #
+#   Weekly score distributions for the sampling win probability models.   #
+#   Each model fits every team once into a compact parameter array and     #
+#   then draws scores for all teams in one (teams, n_sims) numpy call.     #
+#   Matchup probabilities come from comparing rows of that one draw        #
+#   instead of resampling histories for every game.                        #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+RECENCY_HALF_LIFE = 4.0  # Weeks until a score counts half as much
+MAX_SKEWNESS = 0.99      # Skew-normal can't fit |skewness| above ~0.995
+MIN_STD = 1.0            # Floor for spread fitted from one or two scores
+
+def pad_scores(team_scores, teams):
+    """Score histories as a (teams, longest) array padded with zeros, plus their lengths"""
+    counts = np.array([len(team_scores[team]) for team in teams])
+    padded = np.zeros((len(teams), counts.max() if len(teams) else 0))
+    for i, team in enumerate(teams):
+        padded[i, :counts[i]] = team_scores[team]
+    return padded, counts
+
+def moments(team_scores, teams):
+    """
+    Mean and standard deviation per team. Teams with fewer than two
+    scores get the league's pooled deviation.
+    """
+    means = np.array([np.mean(team_scores[team]) for team in teams])
+    stds = np.array([np.std(team_scores[team], ddof=1) if len(team_scores[team]) > 1 else np.nan for team in teams])
+    pooled = np.nanmean(stds) if np.isfinite(stds).any() else MIN_STD
+    return means, np.maximum(np.nan_to_num(stds, nan=pooled), MIN_STD)
+
+class ScoreModel:
+    """
+    fit() turns {team: [scores]} into self.params, one row per team in
+    self.teams; sample() draws (teams, n_sims) scores from those params.
+    """
+
+    name = None
+
+    def fit(self, team_scores):
+        self.teams = sorted(team_scores)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.params = self.fit_params(team_scores)
+        return self
+
+    def fit_params(self, team_scores):
+        raise NotImplementedError
+
+    def sample(self, n_sims, rng=None):
+        raise NotImplementedError
+
+class BootstrapModel(ScoreModel):
+    """Resample each team's raw history with replacement"""
+
+    name = "bootstrap"
+
+    def fit_params(self, team_scores):
+        self.scores, self.counts = pad_scores(team_scores, self.teams)
+        return self.scores
+
+    def sample(self, n_sims, rng=None):
+        rng = rng or np.random.default_rng()
+        index = (rng.random((len(self.teams), n_sims)) * self.counts[:, None]).astype(np.intp)
+        return np.take_along_axis(self.scores, index, axis=1)
+
+class RecencyBootstrapModel(BootstrapModel):
+    """Resample history with weights halving every RECENCY_HALF_LIFE weeks back"""
+
+    name = "recency"
+
+    def fit_params(self, team_scores):
+        scores = super().fit_params(team_scores)
+
+        # Cumulative weights per row; padding sits at 1 so it is never drawn
+        ages = (self.counts[:, None] - 1) - np.arange(scores.shape[1])[None, :]
+        weights = np.where(ages >= 0, 0.5 ** (np.maximum(ages, 0) / RECENCY_HALF_LIFE), 0.0)
+        self.cumulative = np.cumsum(weights, axis=1) / weights.sum(axis=1, keepdims=True)
+        return scores
+
+    def sample(self, n_sims, rng=None):
+        rng = rng or np.random.default_rng()
+        n_teams, width = self.cumulative.shape
+
+        # Offset row i by i so one searchsorted covers every team
+        rows = np.arange(n_teams)[:, None]
+        flat = (self.cumulative + rows).ravel()
+        index = np.searchsorted(flat, rng.random((n_teams, n_sims)) + rows, 'right') - rows * width
+        index = np.minimum(index, self.counts[:, None] - 1)
+        return np.take_along_axis(self.scores, index, axis=1)
+
+class NormalModel(ScoreModel):
+    """Normal distribution fitted to each team's mean and deviation"""
+
+    name = "gaussian"
+
+    def fit_params(self, team_scores):
+        means, stds = moments(team_scores, self.teams)
+        return np.column_stack([means, stds])
+
+    def sample(self, n_sims, rng=None):
+        rng = rng or np.random.default_rng()
+        mean, std = self.params[:, :1], self.params[:, 1:]
+        return mean + std * rng.standard_normal((len(self.teams), n_sims))
+
+class SkewNormalModel(ScoreModel):
+    """Skew-normal fitted by the method of moments, params (location, scale, delta)"""
+
+    name = "skewnormal"
+
+    def fit_params(self, team_scores):
+        means, stds = moments(team_scores, self.teams)
+        skews = []
+        for team in self.teams:
+            scores = np.asarray(team_scores[team], dtype=float)
+            spread = scores.std()
+            skews.append(np.mean((scores - scores.mean()) ** 3) / spread ** 3 if len(scores) > 2 and spread > 0 else 0.0)
+        skews = np.clip(skews, -MAX_SKEWNESS, MAX_SKEWNESS)
+
+        # Invert skewness(delta) for delta, then match mean and variance
+        b = np.sqrt(2 / np.pi)
+        g = np.abs(skews) ** (2 / 3)
+        delta = np.sign(skews) * np.sqrt(np.pi / 2 * g / (g + ((4 - np.pi) / 2) ** (2 / 3)))
+        scale = stds / np.sqrt(1 - (b * delta) ** 2)
+        location = means - scale * b * delta
+        return np.column_stack([location, scale, delta])
+
+    def sample(self, n_sims, rng=None):
+        rng = rng or np.random.default_rng()
+        location, scale, delta = self.params[:, :1], self.params[:, 1:2], self.params[:, 2:]
+        u, v = rng.standard_normal((2, len(self.teams), n_sims))
+        return location + scale * (delta * np.abs(u) + np.sqrt(1 - delta ** 2) * v)
+
+class KdeModel(BootstrapModel):
+    """Gaussian kernel density: a bootstrap draw plus kernel noise (Silverman bandwidth)"""
+
+    name = "kde"
+
+    def fit_params(self, team_scores):
+        scores = super().fit_params(team_scores)
+        _, stds = moments(team_scores, self.teams)
+        self.bandwidth = 1.06 * stds * self.counts ** -0.2
+        return scores
+
+    def sample(self, n_sims, rng=None):
+        rng = rng or np.random.default_rng()
+        draws = super().sample(n_sims, rng)
+        return draws + self.bandwidth[:, None] * rng.standard_normal(draws.shape)
+
+SCORE_MODELS = {model.name: model for model in (BootstrapModel, RecencyBootstrapModel, NormalModel, SkewNormalModel, KdeModel)}
+
+def get_score_model(name):
+    if name not in SCORE_MODELS:
+        raise ValueError(f"Unknown score model {name!r}, expected one of {', '.join(SCORE_MODELS)}")
+    return SCORE_MODELS[name]()
+
+def win_probabilities(samples, pairs):
+    """P(first beats second) for each (row, row) pair of a draw, ties at half credit"""
+    if not len(pairs):
+        return np.zeros(0)
+    pairs = np.asarray(pairs)
+    first, second = samples[pairs[:, 0]], samples[pairs[:, 1]]
+    return (first > second).mean(axis=1) + 0.5 * (first == second).mean(axis=1)
+
+def get_sampler(name, team_scores, n_sims, seed=None):
+    """
+    Fit a score model and draw n_sims scores per team once. Returns a
+    function (team1, team2) -> team1 win probability over that draw.
+    """
+    model = get_score_model(name).fit(team_scores)
+    samples = model.sample(n_sims, np.random.default_rng(seed))
+    index = model.team_index
+    return lambda team1, team2: float(win_probabilities(samples, [(index[team1], index[team2])])[0])
+
+def get_median_probabilities(name, team_scores, n_sims, seed=None):
+    """P(each team beats the weekly league median) from one draw of every team, ties at half credit"""
+    model = get_score_model(name).fit(team_scores)
+    samples = model.sample(n_sims, np.random.default_rng(seed))
+    medians = np.median(samples, axis=0)
+    probs = (samples > medians).mean(axis=1) + 0.5 * (samples == medians).mean(axis=1)
+    return {team: float(probs[i]) for team, i in model.team_index.items()}
@@ -1,16 +1,20 @@
-import sqlite3
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+import db
+import team_ratings
 import utl
 
 
-def main():
-    # Connect to SQLite
-    db_connection = sqlite3.connect(utl.DB_FILE_25)
+def fetch_week_matchups(league_id, week):
+    """Fetch the raw matchups for a single week from the Sleeper API"""
+    return requests.get(
+        f"https://api.sleeper.app/v1/league/{league_id}/matchups/{week}"
+    ).json()
 
-    # Allows interaction with the db
-    c = db_connection.cursor()
 
+def create_tables(c):
+    """Create every table the ingest writes to"""
     # Create NFL players table
     c.execute("""
     CREATE TABLE IF NOT EXISTS players (
@@ -22,6 +26,17 @@ def main():
     )
     """)
 
+    # Create league settings table
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS leagues (
+        league_id TEXT PRIMARY KEY,
+        season TEXT,
+        name TEXT,
+        settings JSON,
+        scoring_settings JSON
+    )
+    """)
+
     # Create league users table
     c.execute("""
     CREATE TABLE IF NOT EXISTS users (
@@ -56,59 +71,117 @@ def main():
     )
     """)
 
-    # Commit table creation
-    db_connection.commit()
+    # Create team ratings and data version tables
+    team_ratings.create_tables(c)
+    db.create_tables(c)
+
 
-    # Fetch NFL player data and insert into the players table
+def main(db_file=utl.DB_FILE_25, league_id=utl.LEAGUE_ID_2025, workers=1):
+    # Fetch everything first so the write transaction stays short
     print("Fetching NFL player data...")
     players = requests.get("https://api.sleeper.app/v1/players/nfl").json()
-    for pid, pdata in players.items():
-        full_name = pdata.get('full_name', 'Unknown')
-        team = pdata.get('team', '')
-        position = pdata.get('position', '')
-        c.execute("""
-        INSERT OR REPLACE INTO players (player_id, full_name, team, position, data)
-        VALUES (?, ?, ?, ?, ?)
-        """, (pid, full_name, team, position, json.dumps(pdata)))
-    db_connection.commit()
-    print(f"Inserted {len(players)} NFL players.\n")
 
-    # Fetch league users and store in users table
+    print("Fetching league settings...")
+    league = requests.get(f"https://api.sleeper.app/v1/league/{league_id}").json()
+
+    # Weeks from the current NFL week on have live scores, don't rate them yet
+    last_rated_week = team_ratings.last_rated_week(league)
+
     print("Fetching Sleeper users...")
-    users = requests.get(f"https://api.sleeper.app/v1/league/{utl.LEAGUE_ID_2025}/users").json()
-    for user in users:
-        c.execute("""
-        INSERT OR REPLACE INTO users (user_id, display_name, data)
-        VALUES (?, ?, ?)
-        """, (user['user_id'], user['display_name'], json.dumps(user)))
-    db_connection.commit()
-    print(f"Inserted {len(users)} users for Hangover Sundays.\n")
+    users = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/users").json()
 
-    # Fetch league rosters and store in the rosters table
     print("Fetching league rosters...")
-    rosters = requests.get(f"https://api.sleeper.app/v1/league/{utl.LEAGUE_ID_2025}/rosters").json()
-    for roster in rosters:
-        c.execute("""
-        INSERT OR REPLACE INTO rosters (roster_id, owner_id, league_id, players)
-        VALUES (?, ?, ?, ?)
-        """, (roster['roster_id'], roster['owner_id'], utl.LEAGUE_ID_2025, json.dumps(roster['players'])))
-    db_connection.commit()
-    print(f"Inserted {len(rosters)} rosters.\n")
+    rosters = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/rosters").json()
 
-    # Fetch matchups for each week of the year
     print("Fetching league matchups by week...")
-    for week in range(1, 18):  # Regular season weeks
-        matchups = requests.get(
-            f"https://api.sleeper.app/v1/league/{utl.LEAGUE_ID_2025}/matchups/{week}"
-        ).json()
-        
-        if matchups:
+    weeks = range(1, 18)  # Regular season weeks
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        weekly_matchups = list(pool.map(lambda week: fetch_week_matchups(league_id, week), weeks))
+
+    # Connect to SQLite (WAL, so readers keep their snapshot while we write)
+    db_connection = db.connect_writer(db_file)
+
+    # Allows interaction with the db
+    c = db_connection.cursor()
+
+    # Stage the whole refresh in one transaction; readers see none of it
+    # until the commit publishes it together with the new data version
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        create_tables(c)
+        changes_before = db_connection.total_changes
+
+        # Upserts only touch rows whose data actually changed, so an
+        # unchanged refresh leaves total_changes (and the version) alone
+        for pid, pdata in players.items():
+            full_name = pdata.get('full_name', 'Unknown')
+            team = pdata.get('team', '')
+            position = pdata.get('position', '')
+            c.execute("""
+            INSERT INTO players (player_id, full_name, team, position, data)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(player_id) DO UPDATE SET
+                full_name = excluded.full_name, team = excluded.team,
+                position = excluded.position, data = excluded.data
+            WHERE (full_name, team, position, data)
+                IS NOT (excluded.full_name, excluded.team, excluded.position, excluded.data)
+            """, (pid, full_name, team, position, json.dumps(pdata)))
+        print(f"Staged {len(players)} NFL players.\n")
+
+        c.execute("""
+        INSERT INTO leagues (league_id, season, name, settings, scoring_settings)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(league_id) DO UPDATE SET
+            season = excluded.season, name = excluded.name,
+            settings = excluded.settings, scoring_settings = excluded.scoring_settings
+        WHERE (season, name, settings, scoring_settings)
+            IS NOT (excluded.season, excluded.name, excluded.settings, excluded.scoring_settings)
+        """, (
+            league_id,
+            league.get('season'),
+            league.get('name'),
+            json.dumps(league.get('settings', {}), sort_keys=True),
+            json.dumps(league.get('scoring_settings', {}), sort_keys=True)
+        ))
+        print(f"Staged league settings for {league.get('name')}.\n")
+
+        for user in users:
+            c.execute("""
+            INSERT INTO users (user_id, display_name, data)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                display_name = excluded.display_name, data = excluded.data
+            WHERE (display_name, data) IS NOT (excluded.display_name, excluded.data)
+            """, (user['user_id'], user['display_name'], json.dumps(user)))
+        print(f"Staged {len(users)} users for Hangover Sundays.\n")
+
+        for roster in rosters:
+            c.execute("""
+            INSERT INTO rosters (roster_id, owner_id, league_id, players)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(roster_id) DO UPDATE SET
+                owner_id = excluded.owner_id, league_id = excluded.league_id, players = excluded.players
+            WHERE (owner_id, league_id, players)
+                IS NOT (excluded.owner_id, excluded.league_id, excluded.players)
+            """, (roster['roster_id'], roster['owner_id'], league_id, json.dumps(roster['players'])))
+        print(f"Staged {len(rosters)} rosters.\n")
+
+        for week, matchups in zip(weeks, weekly_matchups):
+            if not matchups:
+                continue
             for matchup in matchups:
-                matchup_id = f"{utl.LEAGUE_ID_2025}_{week}_{matchup['roster_id']}"
+                matchup_id = f"{league_id}_{week}_{matchup['roster_id']}"
                 c.execute("""
-                INSERT OR REPLACE INTO matchups 
+                INSERT INTO matchups
                 (matchup_id, week, roster_id, points, starters, players_points, matchup_id_group)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(matchup_id) DO UPDATE SET
+                    week = excluded.week, roster_id = excluded.roster_id, points = excluded.points,
+                    starters = excluded.starters, players_points = excluded.players_points,
+                    matchup_id_group = excluded.matchup_id_group
+                WHERE (week, roster_id, points, starters, players_points, matchup_id_group)
+                    IS NOT (excluded.week, excluded.roster_id, excluded.points, excluded.starters,
+                            excluded.players_points, excluded.matchup_id_group)
                 """, (
                     matchup_id,
                     week,
@@ -118,9 +191,23 @@ def main():
                     json.dumps(matchup.get('players_points', {})),
                     matchup.get('matchup_id')
                 ))
-            db_connection.commit()
-            print(f"Inserted week {week} matchups.")
+            print(f"Staged week {week} matchups.")
+
+            # Fold the week into the team ratings
+            if team_ratings.update_week(db_connection, league_id, week, last_rated_week):
+                print(f"Updated team ratings through week {week}.")
+
+        if db_connection.total_changes > changes_before:
+            version = db.bump_data_version(c)
+            print(f"\nPublishing data version {version}...")
+        else:
+            print("\nNo changes since the last refresh.")
+        c.execute("COMMIT")
+    except BaseException:
+        c.execute("ROLLBACK")
+        raise
+    finally:
+        # Close connection
+        db_connection.close()
 
-    # Close connection
-    db_connection.close()
-    print("Database setup / update complete! Your SQLite DB is ready.")
\ No newline at end of file
+    print("Database setup / update complete! Your SQLite DB is ready.")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import output
+import utl
+
+# ======================================================================== #
+#                                                                          #
+#   Memoized simulation results. Results are keyed by a hash of every      #
+#   input that affects them (score histories, remaining schedule, model,   #
+#   sim count, seed), never by data version, so a sync that changes        #
+#   nothing keeps the cache warm. Entries live in an in-memory LRU and     #
+#   as JSON files on disk, both size-bounded with LRU eviction.            #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+CACHE_DIR = os.path.join(utl.CACHE_DIR, "simulations")
+MAX_MEMORY_ENTRIES = 128
+MAX_DISK_BYTES = 50 * 1024 * 1024
+STATS_FILE = "stats.json"
+
+def fingerprint(**inputs):
+    """Stable hash of simulation inputs"""
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=float)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResultCache:
+    """Two-level (memory, disk) LRU cache of JSON-serializable results"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_MEMORY_ENTRIES, max_bytes=MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.record('memory_hits')
+            return self.memory[key]
+
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.record('misses')
+            return None
+
+        # Touch the file so disk eviction sees it as recently used
+        os.utime(path)
+        self.remember(key, value)
+        self.record('disk_hits')
+        return value
+
+    def put(self, key, value):
+        """Store value in memory and on disk, evicting least recently used entries"""
+        self.remember(key, value)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, self.path(key))
+        self.evict_disk()
+
+    def remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def entries(self):
+        """(mtime, size, path) for every cache file on disk, oldest first"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json") and name != STATS_FILE:
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return sorted(files)
+
+    def evict_disk(self):
+        files = self.entries()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            self.record('evictions')
+
+    def clear(self):
+        self.memory.clear()
+        for _, _, path in self.entries():
+            os.remove(path)
+
+    def record(self, event):
+        """Count a cache event in this process and in the persisted totals"""
+        self.stats[event] += 1
+        totals = load_stats(self.cache_dir)
+        totals[event] = totals.get(event, 0) + 1
+        # Swap the file in whole so concurrent runs never leave it half-written
+        path = os.path.join(self.cache_dir, STATS_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(totals, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+def load_stats(cache_dir=CACHE_DIR):
+    """Persisted hit/miss/eviction totals"""
+    try:
+        with open(os.path.join(cache_dir, STATS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Shared cache for this process
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
+
+def stats_records(cache):
+    """Build one record of cache statistics"""
+    totals = load_stats(cache.cache_dir)
+    hits = totals.get('memory_hits', 0) + totals.get('disk_hits', 0)
+    lookups = hits + totals.get('misses', 0)
+    files = cache.entries()
+
+    yield {
+        'entries': len(files),
+        'disk_bytes': sum(size for _, size, _ in files),
+        'max_disk_bytes': cache.max_bytes,
+        'memory_hits': totals.get('memory_hits', 0),
+        'disk_hits': totals.get('disk_hits', 0),
+        'misses': totals.get('misses', 0),
+        'evictions': totals.get('evictions', 0),
+        'hit_rate': hits / lookups if lookups else 0.0
+    }
+
+@output.rich_renderer("cache_stats")
+def print_stats(rows):
+    """Print cache statistics"""
+    from rich.console import Console
+
+    console = Console()
+
+    for stats in rows:
+        console.print("\n[bold cyan]Simulation Cache[/bold cyan]")
+        console.print(f"Entries: {stats['entries']} ({stats['disk_bytes'] / 1024:.1f} KB of {stats['max_disk_bytes'] / 1024 / 1024:.0f} MB)")
+        console.print(f"Hits: {stats['memory_hits']} memory, {stats['disk_hits']} disk")
+        console.print(f"Misses: {stats['misses']}")
+        console.print(f"Evictions: {stats['evictions']}")
+        console.print(f"Hit Rate: {stats['hit_rate']*100:.1f}%")
+
+def main(clear=False, out=None):
+    out = out or output.RichOutput()
+    cache = get_cache()
+
+    if clear:
+        cache.clear()
+        out.log("Cleared simulation cache.")
+
+    out.write("cache_stats", stats_records(cache))
+
+if __name__ == "__main__":
+    main()
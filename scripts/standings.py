@@ -0,0 +1,145 @@
+import json
+import sqlite3
+import numpy as np
+from collections import defaultdict
+import db
+import utl
+
+# ======================================================================== #
+#                                                                          #
+#   Standings engine. Every record in the league comes from one weeks x    #
+#   teams score matrix: head-to-head games against the scheduled           #
+#   opponent, the extra game against the weekly league median (when the    #
+#   league's settings turn it on) and all-play, all in one vectorized      #
+#   comparison pass over the weeks instead of SQL self-joins.              #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+LEAGUE_ID = utl.LEAGUE_ID_2025
+RESULTS = ("wins", "losses", "ties")
+
+def get_league_rules(db_file, league_id=LEAGUE_ID):
+    """
+    Game format from the league's Sleeper settings. Leagues that were
+    synced before settings were stored get plain head-to-head rules.
+    The median game is only played before playoff_week_start.
+    """
+    conn = db.connect(db_file)
+    try:
+        row = conn.execute("SELECT settings FROM leagues WHERE league_id = ?", (league_id,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+
+    settings = json.loads(row[0]) if row and row[0] else {}
+    return {
+        'median_game': bool(settings.get('league_average_match')),
+        'playoff_week_start': settings.get('playoff_week_start') or None
+    }
+
+def plays_median(rules, week):
+    """Whether teams also play the league median in a week"""
+    return rules['median_game'] and (rules['playoff_week_start'] is None or week < rules['playoff_week_start'])
+
+def get_score_matrix(db_file):
+    """
+    Get the weeks x teams score matrix (NaN where a team has no score),
+    the index of each team's opponent in it (-1 where there is none) and
+    the week number of each row.
+    """
+    conn = db.connect(db_file)
+    c = conn.cursor()
+
+    c.execute("""
+        SELECT r.owner_id, u.display_name, m.week, m.points, m.matchup_id_group
+        FROM matchups m
+        JOIN rosters r ON m.roster_id = r.roster_id
+        JOIN users u ON r.owner_id = u.user_id
+        WHERE m.points > 0
+        ORDER BY m.week
+    """)
+    rows = c.fetchall()
+    conn.close()
+
+    team_names = {owner_id: name for owner_id, name, _, _, _ in rows}
+    teams = sorted(team_names)
+    team_index = {team: i for i, team in enumerate(teams)}
+    weeks = sorted({week for _, _, week, _, _ in rows})
+    week_index = {week: i for i, week in enumerate(weeks)}
+
+    scores = np.full((len(weeks), len(teams)), np.nan)
+    opponents = np.full((len(weeks), len(teams)), -1, dtype=np.intp)
+    groups = defaultdict(list)  # {(week, matchup_id_group): [team index, ...]}
+
+    for owner_id, _, week, points, group in rows:
+        scores[week_index[week], team_index[owner_id]] = points
+        if group is not None:
+            groups[(week, group)].append(team_index[owner_id])
+
+    for (week, _), pair in groups.items():
+        if len(pair) == 2:
+            opponents[week_index[week], pair[0]] = pair[1]
+            opponents[week_index[week], pair[1]] = pair[0]
+
+    return scores, opponents, weeks, teams, team_names
+
+def compare(scores, other):
+    """Win, loss and tie indicators of scores against other (NaN on either side is no game)"""
+    return scores > other, scores < other, scores == other
+
+def calculate_records(scores, opponents, weeks, rules):
+    """
+    Season totals per team (arrays of length teams) for head-to-head,
+    median and all-play games. wins / losses / ties are the actual record:
+    head-to-head plus the median game in the weeks the league plays one.
+    """
+    played = ~np.isnan(scores)
+    totals = {}
+
+    # Head-to-head: each team against its scheduled opponent
+    opponent_scores = np.take_along_axis(scores, np.maximum(opponents, 0), axis=1)
+    opponent_scores[opponents < 0] = np.nan
+    for result, games in zip(RESULTS, compare(scores, opponent_scores)):
+        totals[f"h2h_{result}"] = games.sum(axis=0)
+
+    # League median: one more game a week against the median of that week's
+    # scores (weeks without a median game compare against NaN, i.e. no game)
+    median_weeks = played.any(axis=1) & np.array([plays_median(rules, week) for week in weeks], dtype=bool)
+    medians = np.full((len(scores), 1), np.nan)
+    if median_weeks.any():
+        medians[median_weeks, 0] = np.nanmedian(scores[median_weeks], axis=1)
+    for result, games in zip(RESULTS, compare(scores, medians)):
+        totals[f"median_{result}"] = games.sum(axis=0)
+
+    for result in RESULTS:
+        totals[result] = totals[f"h2h_{result}"] + totals[f"median_{result}"]
+
+    # All-play: one teams x teams comparison per week, a team never plays itself
+    wins, losses, ties = compare(scores[:, :, None], scores[:, None, :])
+    totals['all_play_wins'] = wins.sum(axis=(0, 2))
+    totals['all_play_losses'] = losses.sum(axis=(0, 2))
+    totals['all_play_ties'] = ties.sum(axis=(0, 2)) - played.sum(axis=0)
+
+    # Weekly rank (1 = top score), ties share the better rank
+    ranks = np.where(played, losses.sum(axis=2) + 1, 0)
+    weeks_played = played.sum(axis=0)
+    totals['weeks_played'] = weeks_played
+    totals['avg_rank'] = np.divide(ranks.sum(axis=0), weeks_played, out=np.zeros(len(weeks_played)), where=weeks_played > 0)
+    totals['total_points'] = np.nansum(scores, axis=0)
+    return totals
+
+def team_records(totals, teams, team_names):
+    """Per-team record dicts keyed by owner_id; unknown owners get an empty record"""
+    records = defaultdict(lambda: {**{key: 0 for key in totals}, 'name': ''})
+    for t, team in enumerate(teams):
+        records[team] = {key: values[t].item() for key, values in totals.items()}
+        records[team]['name'] = team_names[team]
+    return records
+
+def get_records(db_file, league_id=LEAGUE_ID):
+    """Actual, median and all-play records for every team under the league's rules"""
+    scores, opponents, weeks, teams, team_names = get_score_matrix(db_file)
+    rules = get_league_rules(db_file, league_id)
+    return team_records(calculate_records(scores, opponents, weeks, rules), teams, team_names)
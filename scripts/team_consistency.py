@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
-import sqlite3
 from collections import defaultdict
 import statistics
-from rich.console import Console
-from rich.table import Table
+import db
+import output
+import standings
 import utl
 
 DB_FILE = utl.DB_FILE_25
+LEAGUE_ID = utl.LEAGUE_ID_2025
 
 def get_weekly_scores(db_file):
     """Get weekly points for each team"""
-    conn = sqlite3.connect(db_file)
+    conn = db.connect(db_file)
     c = conn.cursor()
 
     c.execute("""
@@ -32,40 +33,6 @@ def get_weekly_scores(db_file):
     conn.close()
     return weekly_scores, team_names
 
-def get_actual_records(db_file):
-    """Get actual win-loss records"""
-    conn = sqlite3.connect(db_file)
-    c = conn.cursor()
-
-    c.execute("""
-        SELECT m1.week, 
-               r1.owner_id, m1.points,
-               r2.owner_id, m2.points
-        FROM matchups m1
-        JOIN matchups m2 ON m1.matchup_id_group = m2.matchup_id_group 
-            AND m1.week = m2.week 
-            AND m1.roster_id < m2.roster_id
-        JOIN rosters r1 ON m1.roster_id = r1.roster_id
-        JOIN rosters r2 ON m2.roster_id = r2.roster_id
-        WHERE m1.points > 0
-    """)
-
-    actual_records = defaultdict(lambda: {'wins': 0, 'losses': 0, 'ties': 0})
-
-    for week, owner1, points1, owner2, points2 in c.fetchall():
-        if points1 > points2:
-            actual_records[owner1]['wins'] += 1
-            actual_records[owner2]['losses'] += 1
-        elif points2 > points1:
-            actual_records[owner2]['wins'] += 1
-            actual_records[owner1]['losses'] += 1
-        else:
-            actual_records[owner1]['ties'] += 1
-            actual_records[owner2]['ties'] += 1
-
-    conn.close()
-    return actual_records
-
 def calculate_consistency(weekly_scores):
     """Calculate team consistency (stddev / mean points)"""
     consistency_data = []
@@ -86,10 +53,27 @@ def calculate_consistency(weekly_scores):
     consistency_data.sort(key=lambda x: x['consistency'])
     return consistency_data
 
-def print_consistency_table(weekly_scores, actual_records, team_names):
+def consistency_records(weekly_scores, actual_records, team_names):
+    """Build consistency ranking records, most consistent first"""
+    for rank, team in enumerate(calculate_consistency(weekly_scores), 1):
+        owner_id = team['owner_id']
+        actual = actual_records[owner_id]
+        yield {
+            'rank': rank,
+            'owner_id': owner_id,
+            'name': team_names[owner_id],
+            'actual_wins': actual['wins'],
+            'actual_losses': actual['losses'],
+            'consistency': team['consistency']
+        }
+
+@output.rich_renderer("consistency")
+def print_consistency_table(consistency_rows):
     """Print a Rich table showing team consistency"""
+    from rich.console import Console
+    from rich.table import Table
+
     console = Console()
-    consistency_data = calculate_consistency(weekly_scores)
 
     table = Table(title="Team Consistency Rankings", show_header=True, header_style="bold magenta")
     table.add_column("Rank", justify="center")
@@ -97,8 +81,7 @@ def print_consistency_table(weekly_scores, actual_records, team_names):
     table.add_column("Actual Record", justify="center")
     table.add_column("Consistency", justify="center")
 
-    for rank, team in enumerate(consistency_data, 1):
-        owner_id = team['owner_id']
+    for team in consistency_rows:
         consistency = team['consistency']
 
         # Color-code: low consistency = green, high = red
@@ -111,12 +94,11 @@ def print_consistency_table(weekly_scores, actual_records, team_names):
         else:
             style = "bold red"
 
-        actual = actual_records[owner_id]
-        actual_record = f"{actual['wins']}-{actual['losses']}"
+        actual_record = f"{team['actual_wins']}-{team['actual_losses']}"
 
         table.add_row(
-            str(rank),
-            team_names[owner_id],
+            str(team['rank']),
+            team['name'],
             actual_record,
             f"{consistency:.2f}",
             style=style
@@ -124,12 +106,14 @@ def print_consistency_table(weekly_scores, actual_records, team_names):
 
     console.print(table)
 
-def main():
-    print("[bold magenta]Team Consistency Analysis[/bold magenta]\n")
+@db.with_snapshot
+def main(db_file=DB_FILE, league_id=LEAGUE_ID, out=None):
+    out = out or output.RichOutput()
+    out.log("[bold magenta]Team Consistency Analysis[/bold magenta]\n")
 
-    weekly_scores, team_names = get_weekly_scores(DB_FILE)
-    actual_records = get_actual_records(DB_FILE)
-    print_consistency_table(weekly_scores, actual_records, team_names)
+    weekly_scores, team_names = get_weekly_scores(db_file)
+    actual_records = standings.get_records(db_file, league_id)
+    out.write("consistency", consistency_records(weekly_scores, actual_records, team_names))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+import sqlite3
+import hashlib
+import math
+from collections import defaultdict
+import db
+import output
+import utl
+
+# ======================================================================== #
+#                                                                          #
+#   Per-team strength ratings kept in the DB and updated one week at a     #
+#   time as setup_db ingests matchups. Two models share the table:         #
+#     elo    - classic Elo on head-to-head results                         #
+#     normal - Bayesian normal model of weekly points, shrunk toward       #
+#              the league mean (stored as running sums, so updates are     #
+#              O(1) and the posterior is computed when read)               #
+#   Both give closed-form win probabilities, no sampling needed.           #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+DB_FILE = utl.DB_FILE_25
+LEAGUE_ID = utl.LEAGUE_ID_2025
+RATING_MODELS = ("elo", "normal")
+ELO_BASE = 1500.0
+ELO_K = 20.0
+MIN_TEAM_VARIANCE = 25.0  # Floor for the between-team prior variance (points^2)
+
+def create_tables(c):
+    """Create the ratings tables"""
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS team_ratings (
+        league_id TEXT,
+        owner_id TEXT,
+        elo REAL,
+        games INTEGER,
+        points_sum REAL,
+        points_sq_sum REAL,
+        PRIMARY KEY (league_id, owner_id)
+    )
+    """)
+
+    # Weeks already applied to the ratings, with a checksum of their scores
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS rated_weeks (
+        league_id TEXT,
+        week INTEGER,
+        checksum TEXT,
+        PRIMARY KEY (league_id, week)
+    )
+    """)
+
+def get_week_games(c, league_id, week):
+    """
+    Get (owner1, points1, owner2, points2) for each game of a week, or an
+    empty list if the week isn't complete yet.
+    """
+    c.execute("""
+        SELECT r.owner_id, m.points, m.matchup_id_group
+        FROM matchups m
+        JOIN rosters r ON m.roster_id = r.roster_id
+        WHERE m.week = ? AND m.matchup_id LIKE ? || '\\_%' ESCAPE '\\'
+        ORDER BY m.roster_id
+    """, (week, league_id))
+
+    groups = defaultdict(list)
+    for owner_id, points, group in c.fetchall():
+        if not points or group is None:
+            return []
+        groups[group].append((owner_id, points))
+
+    if not groups or any(len(teams) != 2 for teams in groups.values()):
+        return []
+
+    return [(t1, p1, t2, p2) for (t1, p1), (t2, p2) in (groups[g] for g in sorted(groups))]
+
+def week_checksum(games):
+    """Checksum of a week's results, used to detect stat corrections"""
+    return hashlib.sha1(repr(games).encode()).hexdigest()
+
+def elo_expected(rating1, rating2):
+    """Elo probability that team 1 beats team 2"""
+    return 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+
+def apply_week(c, league_id, week, games, checksum):
+    """Apply one complete week's games to the stored ratings"""
+    c.execute("""
+        SELECT owner_id, elo, games, points_sum, points_sq_sum
+        FROM team_ratings WHERE league_id = ?
+    """, (league_id,))
+    ratings = {row[0]: list(row[1:]) for row in c.fetchall()}
+
+    for owner1, points1, owner2, points2 in games:
+        r1 = ratings.setdefault(owner1, [ELO_BASE, 0, 0.0, 0.0])
+        r2 = ratings.setdefault(owner2, [ELO_BASE, 0, 0.0, 0.0])
+
+        # Elo update, ties count as half a win
+        expected = elo_expected(r1[0], r2[0])
+        result = 1.0 if points1 > points2 else 0.0 if points1 < points2 else 0.5
+        r1[0] += ELO_K * (result - expected)
+        r2[0] -= ELO_K * (result - expected)
+
+        # Sufficient statistics for the normal model
+        for rating, points in ((r1, points1), (r2, points2)):
+            rating[1] += 1
+            rating[2] += points
+            rating[3] += points * points
+
+    for owner_id, (elo, n_games, points_sum, points_sq_sum) in ratings.items():
+        c.execute("""
+        INSERT OR REPLACE INTO team_ratings (league_id, owner_id, elo, games, points_sum, points_sq_sum)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (league_id, owner_id, elo, n_games, points_sum, points_sq_sum))
+
+    c.execute("""
+    INSERT OR REPLACE INTO rated_weeks (league_id, week, checksum)
+    VALUES (?, ?, ?)
+    """, (league_id, week, checksum))
+
+def last_rated_week(league):
+    """
+    Last week of a league whose games are final and can be rated, or None
+    for every week. Weeks being played right now have partial scores.
+    """
+    import league_archive
+
+    season, week = league_archive.get_current_week()
+    if str(league.get('season')) != season:
+        return None
+    return league_archive.last_completed_week(league, week)
+
+def rebuild_ratings(db_connection, league_id, last_week=None):
+    """
+    Recompute a league's ratings from every complete week in order, up to
+    last_week if given (caller commits)
+    """
+    c = db_connection.cursor()
+    create_tables(c)
+
+    c.execute("DELETE FROM team_ratings WHERE league_id = ?", (league_id,))
+    c.execute("DELETE FROM rated_weeks WHERE league_id = ?", (league_id,))
+
+    c.execute("""
+        SELECT DISTINCT week FROM matchups
+        WHERE matchup_id LIKE ? || '\\_%' ESCAPE '\\'
+        ORDER BY week
+    """, (league_id,))
+    for (week,) in c.fetchall():
+        if last_week is not None and week > last_week:
+            break
+        games = get_week_games(c, league_id, week)
+        if games:
+            apply_week(c, league_id, week, games, week_checksum(games))
+
+def update_week(db_connection, league_id, week, last_week=None):
+    """
+    Bring the ratings up to date with one ingested week. New weeks are
+    applied incrementally; a changed or out-of-order week triggers a rebuild.
+    Weeks after last_week are still being played and are not rated.
+    Runs inside the caller's ingest transaction. Returns True if the ratings changed.
+    """
+    c = db_connection.cursor()
+    create_tables(c)
+
+    c.execute("SELECT checksum FROM rated_weeks WHERE league_id = ? AND week = ?", (league_id, week))
+    row = c.fetchone()
+
+    if last_week is not None and week > last_week:
+        if row is None:
+            return False
+        # Rated from live scores by an earlier sync, drop it again
+        rebuild_ratings(db_connection, league_id, last_week)
+        return True
+
+    games = get_week_games(c, league_id, week)
+    if not games:
+        return False
+    checksum = week_checksum(games)
+
+    if row is not None and row[0] == checksum:
+        return False
+
+    c.execute("SELECT MAX(week) FROM rated_weeks WHERE league_id = ?", (league_id,))
+    max_week = c.fetchone()[0]
+    if row is not None or (max_week is not None and max_week > week):
+        rebuild_ratings(db_connection, league_id, last_week)
+        return True
+
+    apply_week(c, league_id, week, games, checksum)
+    return True
+
+def get_ratings(db_file, league_id=LEAGUE_ID):
+    """Get stored ratings with the normal model's posterior for each team"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+
+    try:
+        c.execute("""
+            SELECT owner_id, elo, games, points_sum, points_sq_sum
+            FROM team_ratings WHERE league_id = ?
+        """, (league_id,))
+        rows = c.fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # Nothing ingested yet
+    ratings = {
+        owner_id: {'elo': elo, 'games': n_games, 'points_sum': points_sum, 'points_sq_sum': points_sq_sum}
+        for owner_id, elo, n_games, points_sum, points_sq_sum in rows
+    }
+
+    conn.close()
+    return add_normal_posteriors(ratings)
+
+def add_normal_posteriors(ratings):
+    """
+    Add the posterior mean/variance of each team's scoring level.
+    Weekly points ~ N(strength, sigma2) with prior strength ~ N(league mean, tau2);
+    sigma2 is the pooled within-team variance and tau2 the between-team variance.
+    """
+    teams = [r for r in ratings.values() if r['games'] > 0]
+    total_games = sum(r['games'] for r in teams)
+    if not total_games:
+        return ratings
+
+    league_mean = sum(r['points_sum'] for r in teams) / total_games
+
+    within_ss = sum(r['points_sq_sum'] - r['points_sum'] ** 2 / r['games'] for r in teams)
+    within_df = sum(r['games'] - 1 for r in teams)
+    sigma2 = within_ss / within_df if within_df > 0 else 0.0
+    if sigma2 <= 0:
+        # One game each so far, fall back on the spread of all scores
+        sigma2 = max(sum(r['points_sq_sum'] for r in teams) / total_games - league_mean ** 2, MIN_TEAM_VARIANCE)
+
+    team_means = [r['points_sum'] / r['games'] for r in teams]
+    spread = sum((m - league_mean) ** 2 for m in team_means) / max(len(team_means) - 1, 1)
+    avg_games = total_games / len(teams)
+    tau2 = max(spread - sigma2 / avg_games, MIN_TEAM_VARIANCE)
+
+    for rating in ratings.values():
+        precision = 1 / tau2 + rating['games'] / sigma2
+        rating['mean'] = (league_mean / tau2 + rating['points_sum'] / sigma2) / precision
+        rating['var'] = 1 / precision
+        rating['sigma2'] = sigma2
+
+    return ratings
+
+def normal_win_probability(rating1, rating2):
+    """P(team 1 outscores team 2) under the posterior predictive normals"""
+    spread = math.sqrt(rating1['sigma2'] + rating2['sigma2'] + rating1['var'] + rating2['var'])
+    return 0.5 * (1 + math.erf((rating1['mean'] - rating2['mean']) / (spread * math.sqrt(2))))
+
+def win_probability(ratings, team1, team2, model="elo"):
+    """Closed-form probability that team1 beats team2 under a rating model"""
+    if model == "elo":
+        return elo_expected(ratings[team1]['elo'], ratings[team2]['elo'])
+    if model == "normal":
+        return normal_win_probability(ratings[team1], ratings[team2])
+    raise ValueError(f"Unknown rating model {model!r}, expected one of {', '.join(RATING_MODELS)}")
+
+def rating_records(ratings, team_names):
+    """Build team rating records, highest Elo first"""
+    rows = []
+    for owner_id, rating in ratings.items():
+        rows.append({
+            'owner_id': owner_id,
+            'name': team_names.get(owner_id, owner_id),
+            'games': rating['games'],
+            'elo': rating['elo'],
+            'strength': rating.get('mean'),
+            'strength_sd': math.sqrt(rating['var']) if 'var' in rating else None
+        })
+
+    rows.sort(key=lambda x: x['elo'], reverse=True)
+    return rows
+
+@output.rich_renderer("team_ratings")
+def print_ratings(rows):
+    """Print team ratings table"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    table = Table(title="Team Ratings", show_header=True, header_style="bold magenta")
+    table.add_column("Rank", justify="center", style="bold")
+    table.add_column("Team", style="cyan", no_wrap=False)
+    table.add_column("Games", justify="center")
+    table.add_column("Elo", justify="center", style="bold green")
+    table.add_column("Strength (pts)", justify="center")
+
+    for rank, row in enumerate(rows, 1):
+        strength = "-" if row['strength'] is None else f"{row['strength']:.1f} ± {row['strength_sd']:.1f}"
+        table.add_row(
+            str(rank),
+            row['name'],
+            str(row['games']),
+            f"{row['elo']:.0f}",
+            strength
+        )
+
+    console.print(table)
+
+def get_team_names(db_file):
+    """Get display names by owner_id"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+    c.execute("SELECT user_id, display_name FROM users")
+    team_names = dict(c.fetchall())
+    conn.close()
+    return team_names
+
+def main(db_file=DB_FILE, league_id=LEAGUE_ID, rebuild=False, out=None):
+    out = out or output.RichOutput()
+
+    if rebuild:
+        out.log("[yellow]Rebuilding ratings from all completed weeks...[/yellow]")
+        import league_archive
+        league = league_archive.fetch_json(f"https://api.sleeper.app/v1/league/{league_id}") or {}
+        last_week = last_rated_week(league)
+        db_connection = db.connect_writer(db_file)
+        c = db_connection.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            rebuild_ratings(db_connection, league_id, last_week)
+            db.create_tables(c)
+            db.bump_data_version(c)
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        finally:
+            db_connection.close()
+
+    with db.open_snapshot(db_file) as snapshot:
+        ratings = get_ratings(snapshot, league_id)
+        if not ratings:
+            out.log("No ratings yet, run sync (or ratings --rebuild) first.")
+            return
+        team_names = get_team_names(snapshot)
+
+    out.write("team_ratings", rating_records(ratings, team_names))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 
 # Database information
 DB_FILE_25 = "sleeper_league_25.db"
+CACHE_DIR = ".cache"
+
+
+def db_file_for_season(season):
+    """Get the SQLite database file for a season (e.g. 2025 -> sleeper_league_25.db)"""
+    return f"sleeper_league_{season % 100}.db"
+
 
 # API URLs
 SLEEPER_API_URL = "https://api.sleeper.app/v1/"
@@ -11,6 +18,20 @@ SLEEPER_API_NFL_PLAYERS = "https://api.sleeper.app/v1/players/nfl"
 LEAGUE_ID_2025 = "1253516124402757633" # Hangover Sundays 2025
 LEAGUE_ID_2024 = "1121122562257293312" # Hangover Sundays 2024
 
+# League ID's by season
+CURRENT_SEASON = 2025
+LEAGUE_IDS = {
+    2025: LEAGUE_ID_2025,
+    2024: LEAGUE_ID_2024,
+}
+
+# League settings
+PLAYOFF_TEAMS = 6
+
+# Simulation defaults
+NUM_SIMULATIONS = 10000
+NUM_WORKERS = 4
+
 # Owner IDs for the League
 DYLAN_OWNER_ID = "1121129137239953408" # StringerIHardlyKnowHer
 LIAM_OWNER_ID = "1121129568196235264" # Ballesty
@@ -23,4 +44,22 @@ NICKYJ_OWNER_ID = "1083904103815716864" # MrDoctorBartender
 CONNOR_OWNER_ID = "1083906150413856768" # maytag34
 BURKE_OWNER_ID = "1120530360045084672" # kjburke212
 TAYLOR_OWNER_ID = "1121305037675941888" # twatkinz
-MONTE_OWNER_ID = "1121881416008192000" # monte2424
\ No newline at end of file
+MONTE_OWNER_ID = "1121881416008192000" # monte2424
+# Person behind each owner ID, used to label all-time records
+OWNER_NAMES = {
+    DYLAN_OWNER_ID: "Dylan",
+    LIAM_OWNER_ID: "Liam",
+    MILAN_OWNER_ID: "Milan",
+    JEREMY_OWNER_ID: "Jeremy",
+    JACKSON_OWNER_ID: "Jackson",
+    SEANIE_OWNER_ID: "Seanie",
+    GARRETT_OWNER_ID: "Garrett",
+    NICKYJ_OWNER_ID: "NickyJ",
+    CONNOR_OWNER_ID: "Connor",
+    BURKE_OWNER_ID: "Burke",
+    TAYLOR_OWNER_ID: "Taylor",
+    MONTE_OWNER_ID: "Monte",
+}
+
+# Old Sleeper accounts of the same person -> their *_OWNER_ID above
+OWNER_ALIASES = {}
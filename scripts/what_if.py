@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+import json
+import numpy as np
+from collections import defaultdict
+import db
+import output
+import standings
+import utl
+import win_probability
+
+# ======================================================================== #
+#                                                                          #
+#   What-if analyzer for trades and lineup changes. A roster change        #
+#   rebuilds the affected teams' weekly scores from players_points, then   #
+#   only those teams are re-drawn; every other team keeps its cached       #
+#   draws, so each query re-simulates the season in milliseconds and the   #
+#   before/after difference is not drowned out by sampling noise.          #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+DB_FILE = utl.DB_FILE_25
+LEAGUE_ID = utl.LEAGUE_ID_2025
+REGULAR_SEASON_END_WEEK = 14
+
+def get_weekly_lineups(db_file):
+    """Get each team's weekly points, starters and per-player points"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+
+    c.execute("""
+        SELECT r.owner_id, m.week, m.points, m.starters, m.players_points
+        FROM matchups m
+        JOIN rosters r ON m.roster_id = r.roster_id
+        WHERE m.points > 0
+        ORDER BY m.week
+    """)
+
+    lineups = defaultdict(list)  # {owner_id: [{week, points, starters, players_points}, ...]}
+    player_points = defaultdict(dict)  # {week: {player_id: points}}
+
+    for owner_id, week, points, starters, players_points in c.fetchall():
+        players_points = json.loads(players_points or "{}")
+        lineups[owner_id].append({
+            'week': week,
+            'points': points,
+            'starters': json.loads(starters or "[]"),
+            'players_points': players_points
+        })
+        player_points[week].update(players_points)
+
+    conn.close()
+    return lineups, player_points
+
+def get_roster_players(db_file):
+    """Get the current players on each team's roster"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+
+    c.execute("SELECT owner_id, players FROM rosters")
+    roster_players = {owner_id: set(json.loads(players or "[]")) for owner_id, players in c.fetchall()}
+
+    conn.close()
+    return roster_players
+
+def get_player_positions(db_file, player_ids):
+    """Get positions for the given players (missing players have no position)"""
+    player_ids = list(player_ids)
+    if not player_ids:
+        return {}
+
+    conn = db.connect(db_file)
+    c = conn.cursor()
+
+    placeholders = ",".join("?" * len(player_ids))
+    c.execute(f"SELECT player_id, position FROM players WHERE player_id IN ({placeholders})", player_ids)
+    positions = dict(c.fetchall())
+
+    conn.close()
+    return positions
+
+def resolve_team(db_file, team):
+    """Get the owner_id for an owner_id or display name"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+
+    c.execute("""
+        SELECT user_id FROM users
+        WHERE user_id = ? OR LOWER(display_name) = LOWER(?)
+    """, (team, team))
+    row = c.fetchone()
+
+    conn.close()
+    if row is None:
+        raise ValueError(f"Unknown team {team}")
+    return row[0]
+
+def resolve_player(db_file, player):
+    """Get the player_id for a player_id or full name"""
+    conn = db.connect(db_file)
+    c = conn.cursor()
+
+    c.execute("""
+        SELECT player_id FROM players
+        WHERE player_id = ? OR LOWER(full_name) = LOWER(?)
+    """, (player, player))
+    rows = c.fetchall()
+
+    conn.close()
+    if not rows:
+        raise ValueError(f"Unknown player {player}")
+    if len(rows) > 1:
+        raise ValueError(f"Player name {player} is ambiguous, use a player ID")
+    return rows[0][0]
+
+def trade(team1, players1, team2, players2):
+    """Roster changes for team1 sending players1 to team2 for players2"""
+    return {
+        team1: {'out': list(players1), 'in': list(players2)},
+        team2: {'out': list(players2), 'in': list(players1)},
+    }
+
+def bench(team, players):
+    """Roster changes for team sitting the given starters"""
+    return {team: {'out': list(players), 'in': [], 'bench': list(players)}}
+
+def merge_changes(*changes):
+    """Combine several roster changes into one"""
+    merged = defaultdict(lambda: {'out': [], 'in': [], 'bench': []})
+    for change in changes:
+        for team, moves in change.items():
+            merged[team]['out'].extend(moves['out'])
+            merged[team]['in'].extend(moves['in'])
+            merged[team]['bench'].extend(moves.get('bench', []))
+    return dict(merged)
+
+def validate_changes(changes, roster_players, lineups=None):
+    """
+    Raise ValueError if a change moves a player the team doesn't have,
+    or benches a player who never started for it (which would change nothing).
+    """
+    for team, moves in changes.items():
+        if team not in roster_players:
+            raise ValueError(f"Unknown team {team}")
+        missing = [p for p in moves['out'] if p not in roster_players[team]]
+        if missing:
+            raise ValueError(f"Team {team} does not roster {', '.join(missing)}")
+
+        if lineups is not None:
+            started = {p for week in lineups[team] for p in week['starters']}
+            never_started = [p for p in moves.get('bench', []) if p not in started]
+            if never_started:
+                raise ValueError(f"Team {team} never started {', '.join(never_started)}, nothing to bench")
+
+def adjusted_weekly_scores(lineup, moves, player_points, positions):
+    """
+    Re-score a team's past weeks with a roster change applied.
+    Incoming players start over same-position starters who scored less
+    that week. Each outgoing starter's slot is then filled by the best
+    same-position scorer left among the incoming players, displaced starters
+    and the team's own bench. Without a same-position option the slot stays empty.
+    """
+    out_players = set(moves['out'])
+    incoming = [p for p in moves['in'] if p not in out_players]
+    scores = []
+
+    for week in lineup:
+        starters = week['starters']
+        week_points = player_points[week['week']]
+        points = lambda p: week_points.get(p, 0)
+
+        # Take the team's own starters out, then rebuild the lineup
+        score = week['points'] - sum(week['players_points'].get(p, 0) for p in starters)
+        kept = [p for p in starters if p not in out_players]
+
+        # Re-pick each position's kept slots from its starters plus incoming players
+        pool = [p for p in week['players_points'] if p not in starters and p not in out_players]
+        unplaced = list(incoming)
+        for position in dict.fromkeys(positions.get(p) for p in kept):
+            slots = [p for p in kept if positions.get(p) == position]
+            options = slots + [p for p in unplaced if positions.get(p) == position]
+            options.sort(key=points, reverse=True)
+            score += sum(points(p) for p in options[:len(slots)])
+            pool.extend(options[len(slots):])
+            unplaced = [p for p in unplaced if positions.get(p) != position]
+        pool = unplaced + pool
+
+        for player in starters:
+            if player not in out_players:
+                continue
+
+            candidates = [p for p in pool if positions.get(p) == positions.get(player)]
+            if candidates:
+                best = max(candidates, key=points)
+                score += points(best)
+                pool.remove(best)
+
+        scores.append(score)
+
+    return scores
+
+class SeasonSimulation:
+    """
+    Rest-of-season simulation with one bootstrap draw per team per remaining
+    week and simulation. Draws are cached per team so a what-if only
+    re-draws the teams whose scoring changed.
+    """
+
+    def __init__(self, team_scores, current_records, remaining_matchups,
+                 n_sims=utl.NUM_SIMULATIONS, playoff_teams=utl.PLAYOFF_TEAMS, seed=None, rules=None):
+        self.team_scores = dict(team_scores)
+        self.current_records = current_records
+        self.remaining_matchups = remaining_matchups
+        self.n_sims = n_sims
+        self.playoff_teams = playoff_teams
+        # Without a seed, pick one now: re-drawing a changed team must reuse
+        # its stream so before/after differ only by the change, not by noise
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self.rules = rules or {'median_game': False, 'playoff_week_start': None}
+
+        self.teams = sorted(self.team_scores)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.weeks = sorted({m['week'] for m in remaining_matchups})
+        self.week_index = {week: i for i, week in enumerate(self.weeks)}
+
+        self.draws = {team: self.draw(team, scores) for team, scores in self.team_scores.items()}
+
+    def draw(self, team, scores):
+        """Bootstrap draws of shape (remaining weeks, n_sims) for one team"""
+        # Seed per team so re-drawing one team never shifts another's samples
+        rng = np.random.default_rng([self.seed, self.team_index[team]])
+        return rng.choice(np.asarray(scores, dtype=float), size=(len(self.weeks), self.n_sims))
+
+    def outcomes(self, draws=None):
+        """Expected wins and playoff odds for each team from a set of draws"""
+        draws = draws or self.draws
+        n_teams = len(self.teams)
+
+        current_wins = np.array([self.current_records[t]['wins'] for t in self.teams], dtype=float)
+        current_points = np.array([sum(self.team_scores[t]) for t in self.teams], dtype=float)
+
+        wins = np.zeros((self.n_sims, n_teams))
+        points = np.zeros((self.n_sims, n_teams))
+
+        for matchup in self.remaining_matchups:
+            i1 = self.team_index[matchup['team1']]
+            i2 = self.team_index[matchup['team2']]
+            w = self.week_index[matchup['week']]
+            score1 = draws[matchup['team1']][w]
+            score2 = draws[matchup['team2']][w]
+
+            # Give half credit for ties
+            team1_wins = (score1 > score2) + 0.5 * (score1 == score2)
+            wins[:, i1] += team1_wins
+            wins[:, i2] += 1 - team1_wins
+            points[:, i1] += score1
+            points[:, i2] += score2
+
+        # League median game: every team against the median of that week's draws
+        median_weeks = [w for w, week in enumerate(self.weeks) if standings.plays_median(self.rules, week)]
+        if median_weeks:
+            stacked = np.stack([draws[team][median_weeks] for team in self.teams])  # (teams, weeks, sims)
+            medians = np.median(stacked, axis=0)
+            wins += ((stacked > medians) + 0.5 * (stacked == medians)).sum(axis=1).T
+
+        # Rank by total wins, points for breaks ties
+        total_wins = current_wins + wins
+        total_points = current_points + points
+        order = np.argsort(-(total_wins * 1e6 + total_points), axis=1)
+        made_playoffs = np.zeros((self.n_sims, n_teams), dtype=bool)
+        np.put_along_axis(made_playoffs, order[:, :self.playoff_teams], True, axis=1)
+
+        expected_wins = wins.mean(axis=0)
+        playoff_odds = made_playoffs.mean(axis=0)
+        return {
+            team: {'expected_wins': float(expected_wins[i]), 'playoff_odds': float(playoff_odds[i])}
+            for team, i in self.team_index.items()
+        }
+
+    def what_if(self, new_scores):
+        """Outcomes with some teams' score histories replaced, reusing all other draws"""
+        draws = dict(self.draws)
+        for team, scores in new_scores.items():
+            draws[team] = self.draw(team, scores)
+        return self.outcomes(draws)
+
+def analyze_changes(simulation, changes, lineups, player_points, positions):
+    """Before/after expected wins and playoff odds for a roster change"""
+    new_scores = {
+        team: adjusted_weekly_scores(lineups[team], moves, player_points, positions)
+        for team, moves in changes.items()
+    }
+
+    before = simulation.outcomes()
+    after = simulation.what_if(new_scores)
+    return before, after, new_scores
+
+def what_if_records(before, after, team_names, changes):
+    """Build before/after records, biggest playoff odds swing first"""
+    rows = []
+    for team in before:
+        rows.append({
+            'owner_id': team,
+            'name': team_names[team],
+            'changed': team in changes,
+            'expected_wins_before': before[team]['expected_wins'],
+            'expected_wins_after': after[team]['expected_wins'],
+            'expected_wins_delta': after[team]['expected_wins'] - before[team]['expected_wins'],
+            'playoff_odds_before': before[team]['playoff_odds'],
+            'playoff_odds_after': after[team]['playoff_odds'],
+            'playoff_odds_delta': after[team]['playoff_odds'] - before[team]['playoff_odds']
+        })
+
+    rows.sort(key=lambda x: (x['changed'], abs(x['playoff_odds_delta'])), reverse=True)
+    return rows
+
+@output.rich_renderer("what_if")
+def print_what_if(rows):
+    """Print the before/after table for a roster change"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    table = Table(title="What-If: Rest of Season", show_header=True, header_style="bold magenta")
+    table.add_column("Team", style="cyan", no_wrap=False)
+    table.add_column("Exp. Wins", justify="center")
+    table.add_column("Change", justify="center")
+    table.add_column("Playoff Odds", justify="center")
+    table.add_column("Change", justify="center", style="bold")
+
+    for row in rows:
+        delta = row['playoff_odds_delta']
+        style = "green" if delta > 0.005 else "red" if delta < -0.005 else None
+
+        table.add_row(
+            ("* " if row['changed'] else "") + row['name'],
+            f"{row['expected_wins_before']:.2f} → {row['expected_wins_after']:.2f}",
+            f"{row['expected_wins_delta']:+.2f}",
+            f"{row['playoff_odds_before']*100:.1f}% → {row['playoff_odds_after']*100:.1f}%",
+            f"{delta*100:+.1f}%",
+            style=style
+        )
+
+    console.print(table)
+
+def load_simulation(db_file=DB_FILE, league_id=LEAGUE_ID, n_sims=utl.NUM_SIMULATIONS, workers=1, seed=None):
+    """Load league data and build the cached season simulation"""
+    team_scores, team_names = win_probability.get_team_scores(db_file)
+    current_records = win_probability.get_current_records(db_file, league_id)
+    rules = standings.get_league_rules(db_file, league_id)
+    current_week = win_probability.get_current_week()
+    remaining_matchups = win_probability.get_remaining_matchups(
+        db_file, league_id, current_week, REGULAR_SEASON_END_WEEK, workers
+    )
+
+    simulation = SeasonSimulation(team_scores, current_records, remaining_matchups, n_sims, seed=seed, rules=rules)
+    return simulation, team_names
+
+@db.with_snapshot
+def main(changes, db_file=DB_FILE, league_id=LEAGUE_ID, n_sims=utl.NUM_SIMULATIONS, workers=1, out=None, seed=None):
+    out = out or output.RichOutput()
+
+    out.log("[yellow]Loading league data...[/yellow]")
+    lineups, player_points = get_weekly_lineups(db_file)
+    validate_changes(changes, get_roster_players(db_file), lineups)
+    simulation, team_names = load_simulation(db_file, league_id, n_sims, workers, seed)
+
+    if not simulation.remaining_matchups:
+        out.log("No remaining matchups found. Season may be complete or matchups not yet set.")
+        return
+
+    moved = {p for moves in changes.values() for p in moves['out'] + moves['in']}
+    bench_players = {p for team in changes for week in lineups[team] for p in week['players_points']}
+    positions = get_player_positions(db_file, moved | bench_players)
+
+    out.log(f"[yellow]Re-simulating {len(changes)} changed team(s)...[/yellow]\n")
+    before, after, _ = analyze_changes(simulation, changes, lineups, player_points, positions)
+    out.write("what_if", what_if_records(before, after, team_names, changes))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+import os
+import zipfile
+import numpy as np
+import db
+import output
+import utl
+
+# ======================================================================== #
+#                                                                          #
+#   Exact all-pairs win probabilities for the bootstrap model. Drawing     #
+#   one score with replacement from each team's history, P(team1 wins)     #
+#   is a count over the two sorted score lists (ties at half credit), so   #
+#   the whole team x team matrix is computed with searchsorted instead     #
+#   of sampling. The matrix is cached per data version and a new week      #
+#   only updates the rows and columns of teams whose history grew.         #
+#                                                                          #
+# ======================================================================== #
+
+
+# Configuration
+DB_FILE = utl.DB_FILE_25
+LEAGUE_ID = utl.LEAGUE_ID_2025
+
+# Matrices already built this process, by (db path, league_id)
+_CACHE = {}
+
+class WinMatrix:
+    """
+    wins[i, j] holds sum over team i's scores a of (#j scores < a + 0.5 * #j scores == a),
+    so P(i beats j) = wins[i, j] / (n_i * n_j). Keeping the raw counts lets
+    new scores be folded in without recomputing the other pairs.
+    """
+
+    def __init__(self, team_scores, version=0):
+        self.teams = sorted(team_scores)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.history = {team: list(team_scores[team]) for team in self.teams}
+        self.sorted_scores = [np.sort(np.asarray(self.history[team], dtype=float)) for team in self.teams]
+        self.version = version
+
+        n_teams = len(self.teams)
+        self.wins = np.zeros((n_teams, n_teams))
+        if not n_teams:
+            return
+
+        # One searchsorted per column: every team's scores against team j's sorted list
+        all_scores = np.concatenate(self.sorted_scores)
+        starts = np.cumsum([0] + [len(s) for s in self.sorted_scores[:-1]])
+        for j, column in enumerate(self.sorted_scores):
+            credit = (np.searchsorted(column, all_scores, 'left') + np.searchsorted(column, all_scores, 'right')) / 2
+            self.wins[:, j] = np.add.reduceat(credit, starts) if len(all_scores) else 0
+
+    def counts(self):
+        return np.array([len(s) for s in self.sorted_scores], dtype=float)
+
+    def matrix(self):
+        """P(row team beats column team) for every pair"""
+        counts = self.counts()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            probs = self.wins / np.outer(counts, counts)
+        np.fill_diagonal(probs, 0.5)
+        return np.nan_to_num(probs, nan=0.5)
+
+    def probability(self, team1, team2):
+        """P(team1 beats team2) in O(1)"""
+        i = self.team_index[team1]
+        j = self.team_index[team2]
+        n = len(self.sorted_scores[i]) * len(self.sorted_scores[j])
+        return self.wins[i, j] / n if n else 0.5
+
+    def add_score(self, team, score):
+        """Fold one new score into a team's row and column"""
+        k = self.team_index[team]
+
+        # Row k: the new score against every team's history
+        for j, column in enumerate(self.sorted_scores):
+            self.wins[k, j] += (np.searchsorted(column, score, 'left') + np.searchsorted(column, score, 'right')) / 2
+
+        # Column k: every team's history against the new score
+        for i, row in enumerate(self.sorted_scores):
+            self.wins[i, k] += np.count_nonzero(row > score) + 0.5 * np.count_nonzero(row == score)
+
+        # Neither pass saw the new score against itself (a tie)
+        self.wins[k, k] += 0.5
+
+        self.sorted_scores[k] = np.insert(self.sorted_scores[k], np.searchsorted(self.sorted_scores[k], score), score)
+        self.history[team].append(score)
+
+    def extend(self, team_scores, version):
+        """
+        Update in place to new histories that only add scores to the end of
+        the old ones. Returns False (and changes nothing) if they don't.
+        """
+        if set(team_scores) != set(self.teams):
+            return False
+        for team in self.teams:
+            old = self.history[team]
+            if list(team_scores[team][:len(old)]) != old:
+                return False
+
+        for team in self.teams:
+            for score in team_scores[team][len(self.history[team]):]:
+                self.add_score(team, score)
+        self.version = version
+        return True
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        histories = [np.asarray(self.history[team], dtype=float) for team in self.teams]
+
+        # Write aside and swap in, so a concurrent run never reads half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                teams=np.array(self.teams),
+                lengths=np.array([len(h) for h in histories]),
+                scores=np.concatenate(histories) if histories else np.zeros(0),
+                wins=self.wins,
+                version=self.version,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        teams = [str(team) for team in data['teams']]
+        splits = np.cumsum(data['lengths'])[:-1]
+        histories = np.split(data['scores'], splits) if len(teams) else []
+
+        matrix = cls.__new__(cls)
+        matrix.teams = teams
+        matrix.team_index = {team: i for i, team in enumerate(teams)}
+        matrix.history = {team: h.tolist() for team, h in zip(teams, histories)}
+        matrix.sorted_scores = [np.sort(h) for h in histories]
+        matrix.wins = data['wins']
+        matrix.version = int(data['version'])
+        return matrix
+
+def cache_path(league_id):
+    return os.path.join(utl.CACHE_DIR, f"win_matrix_{league_id}.npz")
+
+def get_win_matrix(db_file, league_id, team_scores):
+    """
+    Get the exact win matrix for the current data version, reusing the
+    in-memory or on-disk copy and extending it when only new weeks were added.
+    """
+    version = db.get_data_version(db_file)
+    key = (db.db_path(db_file), league_id)
+    path = cache_path(league_id)
+
+    matrix = _CACHE.get(key)
+    if matrix is None and os.path.exists(path):
+        try:
+            matrix = WinMatrix.load(path)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            matrix = None  # Missing or corrupt, rebuild it
+
+    if matrix is not None and matrix.version == version and matrix.history == {t: list(s) for t, s in team_scores.items()}:
+        _CACHE[key] = matrix
+        return matrix
+
+    if matrix is None or not matrix.extend(team_scores, version):
+        matrix = WinMatrix(team_scores, version)
+
+    matrix.save(path)
+    _CACHE[key] = matrix
+    return matrix
+
+def check_monte_carlo(matrix, team_scores, n_sims=utl.NUM_SIMULATIONS, seed=None):
+    """
+    Compare win_probability.simulate_matchup with the exact matrix for every pair.
+    Returns the largest absolute error and the worst-case Monte Carlo standard error.
+    """
+    import win_probability
+
+    if seed is not None:
+        np.random.seed(seed)
+
+    exact = matrix.matrix()
+    max_error = 0.0
+    for i, team1 in enumerate(matrix.teams):
+        for j, team2 in enumerate(matrix.teams):
+            if i < j:
+                estimate = win_probability.simulate_matchup(team_scores[team1], team_scores[team2], n_sims)
+                max_error = max(max_error, abs(estimate - exact[i, j]))
+
+    return max_error, 0.5 / np.sqrt(n_sims)
+
+def matrix_records(matrix, team_names):
+    """Build one record per ordered pair of teams"""
+    probs = matrix.matrix()
+    for i, team1 in enumerate(matrix.teams):
+        for j, team2 in enumerate(matrix.teams):
+            if i != j:
+                yield {
+                    'team1': team1,
+                    'team1_name': team_names[team1],
+                    'team2': team2,
+                    'team2_name': team_names[team2],
+                    'team1_win_prob': float(probs[i, j])
+                }
+
+@output.rich_renderer("win_matrix")
+def print_win_matrix(rows):
+    """Print the win probability matrix as a table"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    names = list(dict.fromkeys(row['team1_name'] for row in rows))
+    probs = {(row['team1_name'], row['team2_name']): row['team1_win_prob'] for row in rows}
+
+    table = Table(title="Head-to-Head Win Probability (row beats column)", show_header=True, header_style="bold magenta")
+    table.add_column("Team", style="cyan", no_wrap=True)
+    for name in names:
+        table.add_column(name[:8], justify="center")
+
+    for name1 in names:
+        cells = []
+        for name2 in names:
+            if name1 == name2:
+                cells.append("-")
+                continue
+            p = probs[(name1, name2)]
+            style = "green" if p >= 0.6 else "red" if p <= 0.4 else "white"
+            cells.append(f"[{style}]{p*100:.0f}[/{style}]")
+        table.add_row(name1, *cells)
+
+    console.print(table)
+
+@db.with_snapshot
+def main(db_file=DB_FILE, league_id=LEAGUE_ID, n_sims=utl.NUM_SIMULATIONS, check=False, out=None):
+    import win_probability
+
+    out = out or output.RichOutput()
+
+    team_scores, team_names = win_probability.get_team_scores(db_file)
+    if not team_scores:
+        out.log("No scores found. Run sync first.")
+        return
+
+    matrix = get_win_matrix(db_file, league_id, team_scores)
+    out.write("win_matrix", matrix_records(matrix, team_names))
+
+    if check:
+        max_error, std_error = check_monte_carlo(matrix, team_scores, n_sims)
+        out.log(f"\nMonte Carlo check ({n_sims:,} sims): max |error| {max_error:.4f}, "
+                f"standard error at most {std_error:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
-import sqlite3
 import numpy as np
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import db
+import output
+import score_models
+import standings
 
 # ======================================================================== #
 #                                                                          #
@@ -16,6 +20,7 @@ import requests
 DB_FILE = "sleeper_league_25.db"
 LEAGUE_ID = "1253516124402757633"
 NUM_SIMULATIONS = 10000
+MODELS = tuple(score_models.SCORE_MODELS) + ("exact", "elo", "normal")
 
 def get_current_week():
     """Get current NFL week from Sleeper API"""
@@ -24,7 +29,7 @@ def get_current_week():
 
 def get_team_scores(db_file):
     """Get all historical scores for each team"""
-    conn = sqlite3.connect(db_file)
+    conn = db.connect(db_file)
     c = conn.cursor()
     
     # Get scores grouped by team
@@ -47,20 +52,29 @@ def get_team_scores(db_file):
     conn.close()
     return team_scores, team_names
 
-def get_remaining_matchups(db_file, league_id, current_week, end_week=14):
+def fetch_week_matchups(league_id, week):
+    """Fetch the raw matchups for a week, or None if the request fails"""
+    try:
+        return requests.get(
+            f"https://api.sleeper.app/v1/league/{league_id}/matchups/{week}"
+        ).json()
+    except (requests.RequestException, ValueError):
+        return None
+
+def get_remaining_matchups(db_file, league_id, current_week, end_week=14, workers=1):
     """Get remaining matchups for the regular season"""
-    conn = sqlite3.connect(db_file)
+    conn = db.connect(db_file)
     c = conn.cursor()
     
     remaining_matchups = []
     
     # Only fetch through end_week (default 14 for regular season)
-    for week in range(current_week, end_week + 1):
+    weeks = range(current_week, end_week + 1)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        weekly_matchups = list(pool.map(lambda week: fetch_week_matchups(league_id, week), weeks))
+    
+    for week, matchups in zip(weeks, weekly_matchups):
         try:
-            matchups = requests.get(
-                f"https://api.sleeper.app/v1/league/{league_id}/matchups/{week}"
-            ).json()
-            
             if not matchups or matchups == []:
                 break
             
@@ -89,7 +103,7 @@ def get_remaining_matchups(db_file, league_id, current_week, end_week=14):
                             'team1': owner1,
                             'team2': owner2
                         })
-        except:
+        except (requests.RequestException, ValueError):
             break
     
     conn.close()
@@ -113,8 +127,26 @@ def simulate_matchup(team1_scores, team2_scores, n_sims=10000):
     
     return win_prob
 
-def calculate_win_probabilities(team_scores, remaining_matchups, n_sims=10000):
+def get_predictor(model, team_scores, n_sims=10000, ratings=None, matrix=None, seed=None):
+    """
+    Get a function (team1, team2) -> team1 win probability.
+    The score models (bootstrap, recency, gaussian, skewnormal, kde) draw
+    n_sims scores per team once and compare them, exact looks up the
+    bootstrap probability in a win_matrix.WinMatrix, elo / normal are
+    closed-form lookups on the ratings from team_ratings.get_ratings().
+    """
+    if model in score_models.SCORE_MODELS:
+        return score_models.get_sampler(model, team_scores, n_sims, seed)
+    if model == "exact":
+        return matrix.probability
+    if model in ("elo", "normal"):
+        import team_ratings
+        return lambda team1, team2: team_ratings.win_probability(ratings, team1, team2, model)
+    raise ValueError(f"Unknown model {model!r}, expected one of {', '.join(MODELS)}")
+
+def calculate_win_probabilities(team_scores, remaining_matchups, n_sims=10000, predict=None):
     """Calculate win probabilities for all remaining matchups"""
+    predict = predict or get_predictor("bootstrap", team_scores, n_sims)
     results = []
     
     for matchup in remaining_matchups:
@@ -127,7 +159,7 @@ def calculate_win_probabilities(team_scores, remaining_matchups, n_sims=10000):
         team2_hist = team_scores[team2_id]
         
         # Simulate matchup
-        win_prob = simulate_matchup(team1_hist, team2_hist, n_sims)
+        win_prob = predict(team1_id, team2_id)
         
         results.append({
             'week': week,
@@ -141,63 +173,87 @@ def calculate_win_probabilities(team_scores, remaining_matchups, n_sims=10000):
     
     return results
 
-def simulate_season(team_scores, remaining_matchups, n_sims=10000):
+def simulate_season(team_scores, remaining_matchups, n_sims=10000, predict=None, median_probs=None,
+                    playoff_week_start=None):
     """
     Simulate the rest of the season to get expected wins for each team.
+    median_probs ({team_id: P(beat the weekly median)}) adds the league
+    median game to every week a team plays before playoff_week_start.
     Returns dictionary of {team_id: expected_additional_wins}
     """
+    predict = predict or get_predictor("bootstrap", team_scores, n_sims)
     expected_wins = defaultdict(float)
     
     for matchup in remaining_matchups:
         team1_id = matchup['team1']
         team2_id = matchup['team2']
         
-        # Get historical scores
-        team1_hist = team_scores[team1_id]
-        team2_hist = team_scores[team2_id]
-        
         # Calculate win probability
-        win_prob = simulate_matchup(team1_hist, team2_hist, n_sims)
+        win_prob = predict(team1_id, team2_id)
         
         # Add expected wins
         expected_wins[team1_id] += win_prob
         expected_wins[team2_id] += (1 - win_prob)
+        
+        if median_probs and (playoff_week_start is None or matchup['week'] < playoff_week_start):
+            expected_wins[team1_id] += median_probs[team1_id]
+            expected_wins[team2_id] += median_probs[team2_id]
     
     return expected_wins
 
-def get_current_records(db_file):
-    """Get current win-loss records"""
-    conn = sqlite3.connect(db_file)
-    c = conn.cursor()
-    
-    # Get all matchup results
-    c.execute("""
-        SELECT m1.roster_id, r1.owner_id, u1.display_name,
-               m1.week, m1.points, m1.matchup_id_group,
-               m2.points as opp_points
-        FROM matchups m1
-        JOIN matchups m2 ON m1.matchup_id_group = m2.matchup_id_group 
-            AND m1.week = m2.week 
-            AND m1.roster_id != m2.roster_id
-        JOIN rosters r1 ON m1.roster_id = r1.roster_id
-        JOIN users u1 ON r1.owner_id = u1.user_id
-        WHERE m1.points > 0
-        ORDER BY u1.display_name, m1.week
-    """)
-    
-    records = defaultdict(lambda: {'wins': 0, 'losses': 0, 'name': ''})
+def get_current_records(db_file, league_id=LEAGUE_ID):
+    """Get current win-loss records (including median games if the league plays them)"""
+    return standings.get_records(db_file, league_id)
+
+def matchup_probability_records(matchup_probs, team_names):
+    """Build per-game win probability records"""
+    for result in matchup_probs:
+        yield {
+            'week': result['week'],
+            'team1': result['team1'],
+            'team1_name': team_names[result['team1']],
+            'team1_avg': float(result['team1_avg']),
+            'team1_win_prob': float(result['team1_win_prob']),
+            'team2': result['team2'],
+            'team2_name': team_names[result['team2']],
+            'team2_avg': float(result['team2_avg']),
+            'team2_win_prob': float(result['team2_win_prob'])
+        }
+
+def projection_records(team_names, current_records, expected_wins):
+    """Build season projection records, sorted by projected total wins"""
+    proj_data = []
+    for owner_id, exp_wins in expected_wins.items():
+        curr_wins = current_records[owner_id]['wins']
+        curr_losses = current_records[owner_id]['losses']
+        
+        proj_data.append({
+            'owner_id': owner_id,
+            'name': team_names[owner_id],
+            'wins': curr_wins,
+            'losses': curr_losses,
+            'expected_wins': float(exp_wins),
+            'projected_total': float(curr_wins + exp_wins)
+        })
     
-    for roster_id, owner_id, name, week, points, matchup_id, opp_points in c.fetchall():
-        records[owner_id]['name'] = name
-        if points > opp_points:
-            records[owner_id]['wins'] += 1
-        else:
-            records[owner_id]['losses'] += 1
+    # Sort by projected total
+    proj_data.sort(key=lambda x: x['projected_total'], reverse=True)
+    return proj_data
+
+@output.rich_renderer("matchup_probabilities")
+def print_matchup_probabilities(matchup_rows):
+    """Print remaining matchup win probabilities"""
+    print("\n" + "=" * 60)
+    print("REMAINING MATCHUP WIN PROBABILITIES")
+    print("=" * 60)
     
-    conn.close()
-    return records
+    for result in matchup_rows:
+        print(f"\nWeek {result['week']}:")
+        print(f"  {result['team1_name']:20} ({result['team1_avg']:.1f} avg) - {result['team1_win_prob']*100:.1f}% win probability")
+        print(f"  {result['team2_name']:20} ({result['team2_avg']:.1f} avg) - {result['team2_win_prob']*100:.1f}% win probability")
 
-def print_projections(team_names, current_records, expected_wins):
+@output.rich_renderer("projections")
+def print_projections(projections):
     """Print projections using Rich table"""
     from rich.console import Console
     from rich.table import Table
@@ -210,91 +266,120 @@ def print_projections(team_names, current_records, expected_wins):
     table.add_column("Expected Wins", justify="center")
     table.add_column("Projected Total", justify="center", style="bold green")
     
-    # Prepare data
-    proj_data = []
-    for owner_id, exp_wins in expected_wins.items():
-        name = team_names[owner_id]
-        curr_wins = current_records[owner_id]['wins']
-        curr_losses = current_records[owner_id]['losses']
-        projected_total = curr_wins + exp_wins
-        
-        proj_data.append({
-            'name': name,
-            'current': f"{curr_wins}-{curr_losses}",
-            'expected': exp_wins,
-            'total': projected_total
-        })
-    
-    # Sort by projected total
-    proj_data.sort(key=lambda x: x['total'], reverse=True)
-    
     # Add rows
-    for proj in proj_data:
+    for proj in projections:
         table.add_row(
             proj['name'],
-            proj['current'],
-            f"{proj['expected']:.2f}",
-            f"{proj['total']:.2f}"
+            f"{proj['wins']}-{proj['losses']}",
+            f"{proj['expected_wins']:.2f}",
+            f"{proj['projected_total']:.2f}"
         )
     
     console.print(table)
 
-def main():
-    print("=" * 60)
-    print("Win Probability Calculator - Remaining Season")
-    print("=" * 60)
+@db.with_snapshot
+def main(db_file=DB_FILE, league_id=LEAGUE_ID, n_sims=NUM_SIMULATIONS, workers=1, out=None, model="bootstrap",
+         seed=None, use_cache=True):
+    out = out or output.RichOutput()
+    
+    out.log("=" * 60)
+    out.log("Win Probability Calculator - Remaining Season")
+    out.log("=" * 60)
     
     # Configuration
     REGULAR_SEASON_END_WEEK = 14  # Playoffs start week 15
     
     # Get current week
     current_week = get_current_week()
-    print(f"\nCurrent NFL Week: {current_week}")
-    print(f"Regular Season ends Week {REGULAR_SEASON_END_WEEK}")
+    out.log(f"\nCurrent NFL Week: {current_week}")
+    out.log(f"Regular Season ends Week {REGULAR_SEASON_END_WEEK}")
     
     # Get historical scoring data
-    print("\nLoading historical team scores...")
-    team_scores, team_names = get_team_scores(DB_FILE)
+    out.log("\nLoading historical team scores...")
+    team_scores, team_names = get_team_scores(db_file)
     
-    print(f"Found {len(team_scores)} teams with scoring history")
+    out.log(f"Found {len(team_scores)} teams with scoring history")
     
     # Get remaining matchups (only through week 14)
-    print("\nFetching remaining regular season matchups...")
-    remaining_matchups = get_remaining_matchups(DB_FILE, LEAGUE_ID, current_week, REGULAR_SEASON_END_WEEK)
+    out.log("\nFetching remaining regular season matchups...")
+    remaining_matchups = get_remaining_matchups(db_file, league_id, current_week, REGULAR_SEASON_END_WEEK, workers)
     
     if not remaining_matchups:
-        print("No remaining matchups found. Season may be complete or matchups not yet set.")
+        out.log("No remaining matchups found. Season may be complete or matchups not yet set.")
         return
     
-    print(f"Found {len(remaining_matchups)} remaining matchups")
-    
-    # Calculate win probabilities
-    print(f"\nSimulating matchups ({NUM_SIMULATIONS:,} simulations per matchup)...")
-    matchup_probs = calculate_win_probabilities(team_scores, remaining_matchups, NUM_SIMULATIONS)
-    
-    # Get current records
-    current_records = get_current_records(DB_FILE)
-    
-    # Simulate rest of season
-    print("\nSimulating rest of season...")
-    expected_wins = simulate_season(team_scores, remaining_matchups, NUM_SIMULATIONS)
-    
-    # Print results
-    print("\n" + "=" * 60)
-    print("REMAINING MATCHUP WIN PROBABILITIES")
-    print("=" * 60)
-    
-    for result in matchup_probs:
-        team1_name = team_names[result['team1']]
-        team2_name = team_names[result['team2']]
+    out.log(f"Found {len(remaining_matchups)} remaining matchups")
+    
+    # Ratings are an input to the rating models, so load them up front
+    ratings = None
+    if model in ("elo", "normal"):
+        import team_ratings
+        ratings = team_ratings.get_ratings(db_file, league_id)
+        if not ratings:
+            out.log("No team ratings found. Run sync to build them.")
+            return
+    
+    # Get current records and the league's game format
+    current_records = get_current_records(db_file, league_id)
+    rules = standings.get_league_rules(db_file, league_id)
+    
+    # Reuse the results of an earlier run with the same inputs. Sim count
+    # and seed change any sampled result: the score models, and the median
+    # game odds, which every model draws from a score model.
+    cache = None
+    cached = None
+    if use_cache:
+        import sim_cache
+        cache = sim_cache.get_cache()
+        sampled = model in score_models.SCORE_MODELS or rules['median_game']
+        key = sim_cache.fingerprint(
+            team_scores=team_scores,
+            remaining_matchups=remaining_matchups,
+            model=model,
+            rules=rules,
+            ratings=ratings,
+            n_sims=n_sims if sampled else None,
+            seed=seed if sampled else None
+        )
+        cached = cache.get(key)
+    
+    if cached is not None:
+        out.log("\nUsing cached simulation results")
+        matchup_probs = cached['matchup_probs']
+        expected_wins = cached['expected_wins']
+    else:
+        # Pick the win probability model
+        matrix = None
+        if model == "exact":
+            import win_matrix
+            matrix = win_matrix.get_win_matrix(db_file, league_id, team_scores)
+        predict = get_predictor(model, team_scores, n_sims, ratings, matrix, seed)
         
-        print(f"\nWeek {result['week']}:")
-        print(f"  {team1_name:20} ({result['team1_avg']:.1f} avg) - {result['team1_win_prob']*100:.1f}% win probability")
-        print(f"  {team2_name:20} ({result['team2_avg']:.1f} avg) - {result['team2_win_prob']*100:.1f}% win probability")
+        # Calculate win probabilities
+        if model in score_models.SCORE_MODELS:
+            out.log(f"\nSimulating matchups ({n_sims:,} {model} draws per team)...")
+        else:
+            out.log(f"\nCalculating matchup probabilities ({model} model)...")
+        matchup_probs = calculate_win_probabilities(team_scores, remaining_matchups, n_sims, predict)
+        
+        # Simulate rest of season
+        out.log("\nSimulating rest of season...")
+        median_probs = None
+        if rules['median_game']:
+            # Beating the median needs a joint draw of every team, so the
+            # non-sampling models take the bootstrap's median odds
+            sampler = model if model in score_models.SCORE_MODELS else "bootstrap"
+            median_probs = score_models.get_median_probabilities(sampler, team_scores, n_sims, seed)
+        expected_wins = simulate_season(team_scores, remaining_matchups, n_sims, predict, median_probs,
+                                        rules['playoff_week_start'])
+        
+        if cache is not None:
+            cache.put(key, {'matchup_probs': matchup_probs, 'expected_wins': expected_wins})
     
-    # Print season projections with Rich table
-    print("\n")
-    print_projections(team_names, current_records, expected_wins)
+    # Write results
+    out.write("matchup_probabilities", matchup_probability_records(matchup_probs, team_names))
+    out.log("\n")
+    out.write("projections", projection_records(team_names, current_records, expected_wins))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file